@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Historic File Format Converter - headless batch conversion
+Parses every supported file under the given paths in parallel and writes
+CSV and/or JSON to an output directory, mirroring each directory argument's layout
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from formats import BaseFormatParser, detect_format
+
+# Records content hashes of converted sources so reruns can skip them
+MANIFEST_NAME = ".convert-manifest.json"
+
+OUTPUT_FORMATS = ("csv", "json")
+
+
+def collect_files(paths: List[Path]) -> List[Tuple[Path, Path]]:
+    """
+    Expand directories (recursively) into the files a registered format claims
+
+    Returns (file, output name) pairs; the output name is the file's path
+    relative to the directory argument it was found under, or just its
+    name for a file argument.
+    """
+    files = []
+    for path in paths:
+        if path.is_dir():
+            candidates = [(p, p.relative_to(path)) for p in sorted(path.rglob("*")) if p.is_file()]
+        else:
+            candidates = [(path, Path(path.name))]
+        files.extend((p, name) for p, name in candidates if detect_format(p) is not None)
+    return files
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of the file contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_paths(name: Path, output_dir: Path, formats: List[str]) -> Dict[str, Path]:
+    return {fmt: output_dir / name.parent / f"{name.name}.{fmt}" for fmt in formats}
+
+
+def convert_file(path: Path, name: Path, output_dir: Path, formats: List[str],
+                 previous_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse one file and stream its records to the requested outputs
+
+    Outputs are written under ``output_dir`` at ``name`` plus the format's
+    extension. Runs in a worker process. Returns a summary dict for the report and
+    manifest; files whose hash matches ``previous_hash`` and whose outputs
+    all exist are skipped without parsing.
+    """
+    started = time.perf_counter()
+    summary = {"file": str(path), "status": "ok", "records": 0, "seconds": 0.0}
+
+    try:
+        content_hash = hash_file(path)
+        summary["sha256"] = content_hash
+        outputs = output_paths(name, output_dir, formats)
+
+        if content_hash == previous_hash and all(p.exists() for p in outputs.values()):
+            summary["status"] = "skipped"
+            return summary
+
+        parser_class = detect_format(path)
+        summary["parser"] = parser_class.get_metadata().name
+
+        (output_dir / name.parent).mkdir(parents=True, exist_ok=True)
+        with parser_class(path) as parser:
+            summary["records"] = _write_outputs(parser, outputs)
+            summary["metadata"] = parser.extraction_metadata
+
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = str(e)
+
+    finally:
+        summary["seconds"] = time.perf_counter() - started
+
+    return summary
+
+
+def _write_outputs(parser: BaseFormatParser, outputs: Dict[str, Path]) -> int:
+    """Write records to every output as they come off the parser"""
+    count = 0
+
+    with ExitStack() as stack:
+        writer = None
+        if "csv" in outputs:
+            csv_file = stack.enter_context(open(outputs["csv"], "w", newline="", encoding="utf-8"))
+            writer = csv.DictWriter(csv_file, fieldnames=parser.get_field_names(), extrasaction="ignore")
+            writer.writeheader()
+
+        json_file = None
+        if "json" in outputs:
+            json_file = stack.enter_context(open(outputs["json"], "w", encoding="utf-8"))
+            json_file.write('{"records": [\n')
+
+        for record in parser.iter_records():
+            if writer:
+                writer.writerow(record)
+            if json_file:
+                json_file.write(",\n" if count else "")
+                json.dump(record, json_file, default=str)
+            count += 1
+
+        if json_file:
+            json_file.write('\n], "metadata": ')
+            json.dump(parser.extraction_metadata, json_file, default=str)
+            json_file.write("}\n")
+
+    return count
+
+
+def load_manifest(output_dir: Path) -> Dict[str, str]:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir: Path, manifest: Dict[str, str]):
+    tmp = output_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    tmp.replace(output_dir / MANIFEST_NAME)
+
+
+def print_summary(results: List[Dict[str, Any]], elapsed: float):
+    """Print a per-file timing and record-count table"""
+    width = max([len(Path(r["file"]).name) for r in results] + [4])
+    print(f"\n{'File':<{width}}  {'Status':<8} {'Records':>8} {'Seconds':>8}")
+    for r in sorted(results, key=lambda r: r["file"]):
+        note = f"  {r['error']}" if r["status"] == "error" else ""
+        print(f"{Path(r['file']).name:<{width}}  {r['status']:<8} {r['records']:>8} {r['seconds']:>8.2f}{note}")
+
+    converted = [r for r in results if r["status"] == "ok"]
+    print(f"\n{len(converted)} converted, "
+          f"{sum(r['status'] == 'skipped' for r in results)} skipped, "
+          f"{sum(r['status'] == 'error' for r in results)} failed, "
+          f"{sum(r['records'] for r in converted)} records in {elapsed:.2f}s")
+
+
+def main():
+    """Entry point"""
+    arg_parser = argparse.ArgumentParser(description="Convert historic data files to CSV/JSON")
+    arg_parser.add_argument("paths", nargs="+", type=Path, help="Files or directories to convert")
+    arg_parser.add_argument("-o", "--output", type=Path, default=Path("converted"),
+                            help="Output directory (default: ./converted)")
+    arg_parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS + ("both",), default="csv",
+                            help="Output format (default: csv)")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                            help="Worker processes (default: one per core)")
+    arg_parser.add_argument("--force", action="store_true",
+                            help="Reconvert files even if their content is unchanged")
+    args = arg_parser.parse_args()
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No supported files found")
+        return 1
+
+    # Two arguments can still map different files onto one output name;
+    # the same file given twice is converted once
+    sources: Dict[Path, Path] = {}
+    for path, name in files:
+        if sources.setdefault(name, path).resolve() != path.resolve():
+            print(f"Both {sources[name]} and {path} would be written to {name}; "
+                  f"pass their common parent directory instead")
+            return 1
+    files = [(path, name) for name, path in sources.items()]
+
+    formats = list(OUTPUT_FORMATS) if args.format == "both" else [args.format]
+    args.output.mkdir(parents=True, exist_ok=True)
+    manifest = {} if args.force else load_manifest(args.output)
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(convert_file, path, name, args.output, formats, manifest.get(str(path.resolve())))
+            for path, name in files
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"{result['status']:<8} {result['file']}")
+
+            if result["status"] in ("ok", "skipped"):
+                manifest[str(Path(result["file"]).resolve())] = result["sha256"]
+
+    save_manifest(args.output, manifest)
+    print_summary(results, time.perf_counter() - started)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
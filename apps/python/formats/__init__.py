@@ -1,7 +1,30 @@
 """Format modules for historic file format conversion"""
 
-from .base import BaseFormatParser, FormatMetadata
+from .base import BaseFormatParser, FormatMetadata, Column
 from .smartware import SmartWareParser
 from .dbase import DBaseParser
+from .registry import FormatRegistry, registry, detect_format
+from .cache import ParseCache, ParserCache
+from .stats import RecordStats, ColumnStats, HyperLogLog, GroupedStats, CorpusStats, summarize_file
 
-__all__ = ["BaseFormatParser", "FormatMetadata", "SmartWareParser", "DBaseParser"]
+registry.register(SmartWareParser)
+registry.register(DBaseParser)
+
+__all__ = [
+    "BaseFormatParser",
+    "FormatMetadata",
+    "Column",
+    "SmartWareParser",
+    "DBaseParser",
+    "FormatRegistry",
+    "registry",
+    "detect_format",
+    "ParseCache",
+    "ParserCache",
+    "RecordStats",
+    "ColumnStats",
+    "HyperLogLog",
+    "GroupedStats",
+    "CorpusStats",
+    "summarize_file",
+]
@@ -1,10 +1,28 @@
 """Base format parser interface"""
 
+import mmap
+import os
+import re
+import stat
+import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Sequence
 from dataclasses import dataclass
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Column kinds returned by BaseFormatParser.get_field_types()
+FLOAT = 'float'
+DATE = 'date'
+BOOL = 'bool'
+TEXT = 'text'
+
+_DATE_TEXT = re.compile(r'\d{4}/\d{2}/\d{2}')
+
 
 @dataclass
 class FormatMetadata:
@@ -17,6 +35,55 @@ class FormatMetadata:
     magic_bytes: Optional[bytes] = None
 
 
+@dataclass
+class Column:
+    """
+    One field of a columnar parse
+
+    ``values`` is a NumPy array typed by column kind: float64 for FLOAT,
+    datetime64[D] for DATE, bool for BOOL and object for TEXT. ``valid``
+    is False wherever the record value was missing (None) or unparseable;
+    those slots hold NaN/NaT/False/None.
+    """
+    name: str
+    kind: str
+    values: Any
+    valid: Any
+
+    @property
+    def null_bitmap(self) -> bytes:
+        """Validity as an Arrow-style bitmap (LSB first, 1 = valid)"""
+        return np.packbits(self.valid, bitorder='little').tobytes()
+
+    @classmethod
+    def from_values(cls, name: str, kind: str, values: Sequence[Any]) -> 'Column':
+        """Build a typed column from per-record Python values"""
+        if kind == FLOAT:
+            valid = np.array([v is not None for v in values], dtype=bool)
+            data = np.array([float('nan') if v is None else v for v in values], dtype=np.float64)
+        elif kind == DATE:
+            data = np.array([_to_datetime64(v) for v in values], dtype='datetime64[D]')
+            valid = ~np.isnat(data)
+        elif kind == BOOL:
+            valid = np.array([v is not None for v in values], dtype=bool)
+            data = np.array([bool(v) for v in values], dtype=bool)
+        else:
+            valid = np.array([v is not None for v in values], dtype=bool)
+            data = np.empty(len(values), dtype=object)
+            data[:] = values
+        return cls(name, kind, data, valid)
+
+
+def _to_datetime64(value):
+    """Convert a YYYY/MM/DD string to datetime64[D], or NaT if it is not a real date"""
+    if isinstance(value, str) and _DATE_TEXT.fullmatch(value):
+        try:
+            return np.datetime64(value.replace('/', '-'), 'D')
+        except ValueError:
+            pass
+    return np.datetime64('NaT', 'D')
+
+
 class BaseFormatParser(ABC):
     """Base class for all format parsers"""
 
@@ -26,28 +93,128 @@ class BaseFormatParser(ABC):
         """Return metadata about this format"""
         pass
 
-    def __init__(self, filepath: Path):
+    # Map regular files read-only instead of copying them into memory
+    use_mmap = True
+
+    # Bump when a parser's output changes so cached parse results are dropped
+    parser_version = 1
+
+    def __init__(self, filepath: Path, data: Optional[bytes] = None):
+        """
+        Args:
+            filepath: File to parse
+            data: File contents already in memory (e.g. an upload); when
+                given, the file is not opened
+        """
         self.filepath = filepath
         self.filename = filepath.name
-        self.data = filepath.read_bytes()
+        self.data = data if data is not None else self._open_buffer(filepath)
+        self.view = memoryview(self.data)
         self.records: List[Dict[str, Any]] = []
         self.extraction_metadata: Dict[str, Any] = {}
 
+    def _open_buffer(self, filepath: Path):
+        """
+        Open the file as a read-only buffer
+
+        Regular, non-empty files are memory-mapped so pages are only read
+        in as they are touched and shared between parser instances.
+        Anything else (pipes, empty files, failed maps) is read as bytes.
+        """
+        with open(filepath, 'rb') as f:
+            info = os.fstat(f.fileno())
+            if self.use_mmap and stat.S_ISREG(info.st_mode) and info.st_size > 0:
+                try:
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass
+            return f.read()
+
+    def close(self):
+        """Release the file buffer, unmapping it if memory-mapped"""
+        self.view.release()
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:
+                # A suspended iter_records() still holds the buffer; the
+                # mapping is released when that generator is collected
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @abstractmethod
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Parse the file, yielding records as they are extracted
+
+        Implementations should fill in ``extraction_metadata`` once the
+        generator is exhausted.
+        """
+        pass
+
     def parse(self) -> Dict[str, Any]:
         """
         Parse the file and extract data
 
+        Materializes ``iter_records()`` into ``self.records``.
+
         Returns:
             Dict with 'records' and 'metadata' keys
         """
-        pass
+        self.records = list(self.iter_records())
+        return {'records': self.records, 'metadata': self.extraction_metadata}
 
     @abstractmethod
     def get_field_names(self) -> List[str]:
         """Return the field names extracted from this format"""
         pass
 
+    def get_field_types(self) -> Dict[str, str]:
+        """
+        Return the column kind (FLOAT, DATE, BOOL or TEXT) of each field
+
+        Fields left out are treated as TEXT.
+        """
+        return {}
+
+    def to_columns(self) -> Dict[str, Column]:
+        """
+        Return the parsed data as typed NumPy columns keyed by field name
+
+        Uses ``self.records`` if the file has already been parsed, and
+        otherwise streams ``iter_records()`` without keeping the dicts.
+        """
+        if np is None:
+            raise RuntimeError("to_columns() requires NumPy")
+
+        names = self.get_field_names()
+        cells = [[] for _ in names]
+        for record in self.records or self.iter_records():
+            for column, name in zip(cells, names):
+                column.append(record.get(name))
+
+        types = self.get_field_types()
+        return {name: Column.from_values(name, types.get(name, TEXT), column)
+                for name, column in zip(names, cells)}
+
+    def memory_size(self) -> int:
+        """Approximate bytes held by this parser: input buffer plus records"""
+        return len(self.data) + self.records_size(self.records)
+
+    @staticmethod
+    def records_size(records: List[Dict[str, Any]]) -> int:
+        """Estimate the size of a record list from its first record"""
+        if not records:
+            return sys.getsizeof(records)
+        sample = records[0]
+        per_record = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample.values())
+        return sys.getsizeof(records) + per_record * len(records)
+
     def validate(self) -> bool:
         """
         Validate that the file matches this format
@@ -65,7 +232,7 @@ class BaseFormatParser(ABC):
 
         # Check magic bytes if defined
         if metadata.magic_bytes and len(self.data) >= len(metadata.magic_bytes):
-            if not self.data.startswith(metadata.magic_bytes):
+            if self.view[:len(metadata.magic_bytes)] != metadata.magic_bytes:
                 return False
 
         return True
@@ -0,0 +1,231 @@
+"""Persistent on-disk cache of parse results"""
+
+import hashlib
+import os
+import pickle
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from .base import BaseFormatParser
+
+# Cache directory and size bound, overridable from the environment
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "LABS_PARSE_CACHE_DIR",
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "labs-teleports" / "parse",
+))
+DEFAULT_MAX_BYTES = int(os.environ.get("LABS_PARSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Memory bound for parsers kept open by a ParserCache
+DEFAULT_PARSER_CACHE_BYTES = int(os.environ.get("LABS_PARSER_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+class ParseCache:
+    """
+    Parse results keyed by file content hash and parser version
+
+    Each entry holds a parser's records and extraction_metadata, pickled
+    and zlib-compressed in its own file. Reads refresh the entry's mtime,
+    and writes evict the least recently used entries once the directory
+    grows past ``max_bytes``.
+    """
+
+    SUFFIX = ".parse"
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def content_hash(parser: BaseFormatParser) -> str:
+        """SHA-256 of the parser's input buffer"""
+        return hashlib.sha256(parser.view).hexdigest()
+
+    def key_for(self, parser: BaseFormatParser, content_hash: Optional[str] = None) -> str:
+        """Cache key for a parser: content hash plus parser class and version"""
+        content_hash = content_hash or self.content_hash(parser)
+        return f"{content_hash}-{type(parser).__name__}-v{parser.parser_version}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """Return (records, metadata) for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            payload = pickle.loads(zlib.decompress(path.read_bytes()))
+            os.utime(path)  # Mark as recently used
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        return payload["records"], payload["metadata"]
+
+    def put(self, key: str, records: List[Dict[str, Any]], metadata: Dict[str, Any]):
+        """Store a parse result, then evict old entries if over the size bound"""
+        payload = zlib.compress(pickle.dumps(
+            {"records": records, "metadata": metadata}, protocol=pickle.HIGHEST_PROTOCOL))
+
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_bytes(payload)
+            tmp.replace(path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for path in self.directory.glob("*" + self.SUFFIX):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def load_into(self, parser: BaseFormatParser, key: str) -> bool:
+        """
+        Fill a parser's records and extraction_metadata from the entry for key
+
+        Returns False, leaving the parser untouched, on a miss.
+        """
+        cached = self.get(key)
+        if cached is None:
+            return False
+
+        parser.records, parser.extraction_metadata = cached
+        if 'filename' in parser.extraction_metadata:
+            # Same content may have been cached under another name
+            parser.extraction_metadata['filename'] = parser.filename
+        return True
+
+    def parse(self, parser: BaseFormatParser) -> Dict[str, Any]:
+        """
+        Parse through the cache
+
+        On a hit the parser's records and extraction_metadata are filled in
+        from disk without scanning the file; on a miss it is parsed and the
+        result stored.
+        """
+        key = self.key_for(parser)
+        if not self.load_into(parser, key):
+            parser.parse()
+            self.put(key, parser.records, parser.extraction_metadata)
+
+        return {'records': parser.records, 'metadata': parser.extraction_metadata}
+
+    def clear(self):
+        """Remove every cache entry"""
+        for path in self.directory.glob("*" + self.SUFFIX):
+            path.unlink(missing_ok=True)
+
+
+class ParserCache:
+    """
+    In-memory LRU of parsed parsers, bounded by their total memory_size()
+
+    Adding a parser evicts, and closes, the least recently used ones until
+    the total fits ``max_bytes``. A parser just added as recent is never
+    evicted, so a single file larger than the bound can still be viewed;
+    one added with ``recent=False`` is evicted first if it does not fit.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_PARSER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Any, Tuple[BaseFormatParser, int]]" = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self._entries))
+
+    def get(self, key) -> Optional[BaseFormatParser]:
+        """Return a cached parser and mark it most recently used, counting the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, parser: BaseFormatParser, recent: bool = True):
+        """
+        Add a parser, then evict least recently used ones past max_bytes
+
+        Args:
+            key: Cache key, normally the file path
+            parser: Parsed parser; its size is measured once, here
+            recent: Mark as most recently used; otherwise it is the first
+                candidate for eviction (for speculative parses), and is
+                closed straight away if it does not fit
+        """
+        self.pop(key)
+        size = parser.memory_size()
+        self._entries[key] = (parser, size)
+        self.size += size
+        if not recent:
+            self._entries.move_to_end(key, last=False)
+
+        for old_key in list(self._entries):
+            if self.size <= self.max_bytes:
+                break
+            if old_key != key or not recent:
+                self.evict(old_key)
+
+    def peek(self, key) -> Optional[BaseFormatParser]:
+        """Return a cached parser without touching its recency or the counters"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def pop(self, key) -> Optional[BaseFormatParser]:
+        """Remove a parser without closing it"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size -= entry[1]
+        return entry[0]
+
+    def evict(self, key):
+        """Close and remove a parser, counting it as an eviction"""
+        parser = self.pop(key)
+        if parser is not None:
+            parser.close()
+            self.evictions += 1
+
+    def clear(self):
+        """Close and remove every parser"""
+        for parser, _ in self._entries.values():
+            parser.close()
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters and sizes for display"""
+        return {
+            'parsers': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
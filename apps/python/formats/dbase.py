@@ -1,10 +1,82 @@
 """dBase III/IV format parser (example template)"""
 
 import struct
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import date
 
-from .base import BaseFormatParser, FormatMetadata
+from .base import BaseFormatParser, FormatMetadata, Column, FLOAT, DATE, BOOL, TEXT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _convert_numeric(value: str):
+    if not value:
+        return None
+    try:
+        return float(value) if '.' in value else int(value)
+    except ValueError:
+        return None
+
+
+def _convert_date(value: str) -> str:
+    # Date (YYYYMMDD)
+    if len(value) == 8:
+        return f"{value[0:4]}/{value[4:6]}/{value[6:8]}"
+    return value
+
+
+# Field type -> converter applied to the stripped text of each cell.
+# Character and unknown types are kept as text.
+_CONVERTERS = {
+    'N': _convert_numeric,
+    'L': frozenset(('T', 't', 'Y', 'y')).__contains__,
+    'D': _convert_date,
+}
+
+# Field type -> column kind for to_columns()
+_COLUMN_KINDS = {
+    'N': FLOAT,
+    'L': BOOL,
+    'D': DATE,
+}
+
+
+class _RecordDecoder:
+    """
+    Record decoder compiled once per schema
+
+    The field descriptors become a single struct layout for the whole row
+    plus a converter for each non-text column, so decoding a row is one
+    unpack and direct calls instead of branching on the type of every cell.
+    """
+
+    def __init__(self, field_definitions: List[Dict[str, Any]]):
+        self.names = tuple(f['name'] for f in field_definitions)
+        self.lengths = tuple(f['length'] for f in field_definitions)
+        self.converters = tuple((i, _CONVERTERS[f['type']])
+                                for i, f in enumerate(field_definitions)
+                                if f['type'] in _CONVERTERS)
+        self.layout = struct.Struct('<' + ''.join(f"{length}s" for length in self.lengths))
+
+    def decode(self, buffer, offset: int) -> Dict[str, Any]:
+        """Decode the fields starting at offset (just past the deletion flag)"""
+        if offset + self.layout.size <= len(buffer):
+            values = self.layout.unpack_from(buffer, offset)
+        else:
+            # Truncated final record: take whatever bytes are left per field
+            values = []
+            for length in self.lengths:
+                values.append(bytes(buffer[offset:offset + length]))
+                offset += length
+
+        cells = [raw.decode('ascii', errors='ignore').strip() for raw in values]
+        for i, convert in self.converters:
+            cells[i] = convert(cells[i])
+
+        return dict(zip(self.names, cells))
 
 
 class DBaseParser(BaseFormatParser):
@@ -26,50 +98,197 @@ class DBaseParser(BaseFormatParser):
             magic_bytes=b'\x03',  # dBase III without memo
         )
 
-    def __init__(self, filepath):
-        super().__init__(filepath)
+    def __init__(self, filepath, data=None, header_only=False):
+        """
+        Args:
+            filepath: File to parse
+            data: File contents already in memory, if any
+            header_only: Only read the header and field descriptors now;
+                records are decoded on first access to ``records``
+        """
+        super().__init__(filepath, data)
         self.field_names = []
         self.field_definitions = []
+        self.header: Optional[Dict[str, Any]] = None
+
+        if header_only:
+            try:
+                header = self.read_header()
+                self.extraction_metadata = {
+                    'filename': self.filename,
+                    'records': header['record_count'],
+                    'fields': len(self.field_names),
+                    'last_update': header['last_update'],
+                }
+            except Exception as e:
+                self.extraction_metadata = {'error': str(e)}
+            self._records = None
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """Parsed records, decoded on first access in header-only mode"""
+        if self._records is None:
+            self.parse()
+        return self._records
+
+    @records.setter
+    def records(self, value: List[Dict[str, Any]]):
+        self._records = value
+
+    @property
+    def record_count(self) -> int:
+        """Number of records declared in the header, including deleted rows"""
+        return self.read_header()['record_count']
+
+    def memory_size(self) -> int:
+        """Approximate bytes held, without decoding records in header-only mode"""
+        return len(self.data) + self.records_size(self._records or [])
+
+    def _try_read_header(self):
+        """Read the header if possible, keeping whatever fields a truncated one holds"""
+        if self.header is None and len(self.data) >= 32:
+            try:
+                self.read_header()
+            except ValueError:
+                pass
 
     def get_field_names(self) -> List[str]:
-        """Return field names from dBase header"""
+        """Return field names from dBase header (those read so far if it is truncated)"""
+        self._try_read_header()
         return self.field_names
 
-    def parse(self) -> Dict[str, Any]:
+    def get_field_types(self) -> Dict[str, str]:
+        """Map dBase field types onto column kinds"""
+        self._try_read_header()
+        return {f['name']: _COLUMN_KINDS.get(f['type'], TEXT) for f in self.field_definitions}
+
+    def to_columns(self) -> Dict[str, Column]:
+        """
+        Return the records as typed NumPy columns keyed by field name
+
+        The record area is viewed in place as a fixed-width NumPy table, and
+        each column is converted once per distinct raw value rather than
+        once per row, so no per-record dicts are built.
+        """
+        if np is None or len(self.data) < 32:
+            return super().to_columns()
+
+        header = self.read_header()
+        names = self.field_names
+        lengths = [f['length'] for f in self.field_definitions]
+        start = header['header_length']
+        record_length = header['record_length']
+        rows = min(header['record_count'], max(len(self.data) - start, 0) // record_length)
+
+        # Duplicate or zero-width fields, overlapping rows and a truncated
+        # final record are left to the record-by-record path
+        if (len(set(names)) != len(names) or 0 in lengths
+                or 1 + sum(lengths) > record_length
+                or (rows < header['record_count'] and start + rows * record_length < len(self.data))):
+            return super().to_columns()
+
+        offsets = [1]
+        for length in lengths[:-1]:
+            offsets.append(offsets[-1] + length)
+        table = np.frombuffer(self.view, count=rows, offset=start, dtype=np.dtype({
+            'names': [f'f{i}' for i in range(len(names))],
+            'formats': [f'V{length}' for length in lengths],
+            'offsets': offsets,
+            'itemsize': record_length,
+        }))
+        flags = np.frombuffer(self.view, dtype=np.uint8, count=rows * record_length, offset=start)
+        live = flags[::record_length] != ord('*')
+
+        columns = {}
+        for i, field_def in enumerate(self.field_definitions):
+            distinct, inverse = np.unique(table[f'f{i}'][live], return_inverse=True)
+            convert = _CONVERTERS.get(field_def['type'])
+            values = [raw.tobytes().decode('ascii', errors='ignore').strip() for raw in distinct]
+            if convert is not None:
+                values = [convert(value) for value in values]
+
+            column = Column.from_values(field_def['name'], _COLUMN_KINDS.get(field_def['type'], TEXT), values)
+            column.values = column.values[inverse]
+            column.valid = column.valid[inverse]
+            columns[field_def['name']] = column
+
+        return columns
+
+    def read_header(self) -> Dict[str, Any]:
+        """
+        Parse the header and field descriptors without touching the records
+
+        The header is only parsed once; later calls return the cached dict.
         """
-        Parse dBase file
+        if self.header is None:
+            if len(self.data) < 32:
+                raise ValueError('File too small')
+
+            header = self._parse_header()
+            self.field_names = []
+            self.field_definitions = []
+            self._parse_field_descriptors(header['header_length'])
+            if not header['record_length']:
+                # Some writers leave this zero; the row is the flag plus all fields
+                header['record_length'] = 1 + sum(f['length'] for f in self.field_definitions)
+            self._decoder = _RecordDecoder(self.field_definitions)
+            self.header = header
+
+        return self.header
+
+    def get_record(self, n: int) -> Optional[Dict[str, Any]]:
+        """
+        Decode record number n (0-based) without reading the rows before it
+
+        Records are fixed length, so the row is read straight from
+        header_length + n * record_length. Returns None if the record is
+        flagged deleted.
+        """
+        header = self.read_header()
+        index = n + header['record_count'] if n < 0 else n
+        if not 0 <= index < header['record_count']:
+            raise IndexError(f"record {n} out of range")
+
+        offset = header['header_length'] + index * header['record_length']
+        if offset >= len(self.data):
+            raise IndexError(f"record {n} is past the end of the file")
+
+        return self._parse_record(offset)
+
+    def get_records(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Decode records start to stop - 1 (0-based), skipping deleted rows"""
+        header = self.read_header()
+        return list(self._parse_records(max(start, 0), min(stop, header['record_count'])))
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Parse dBase file, yielding one record at a time
 
         dBase file structure:
         - Header (32 bytes)
         - Field descriptors (32 bytes each)
         - Records (variable length)
         """
-        if len(self.data) < 32:
-            self.extraction_metadata = {'error': 'File too small'}
-            return {'records': [], 'metadata': self.extraction_metadata}
+        record_count = 0
 
         try:
-            # Parse header
-            header = self._parse_header()
-
-            # Parse field descriptors
-            self._parse_field_descriptors(header['header_length'])
+            # Parse header and field descriptors
+            header = self.read_header()
 
             # Parse records
-            self._parse_records(header['record_count'], header['header_length'])
+            for record in self._parse_records(0, header['record_count']):
+                record_count += 1
+                yield record
 
             self.extraction_metadata = {
                 'filename': self.filename,
-                'records': len(self.records),
+                'records': record_count,
                 'fields': len(self.field_names),
                 'last_update': header.get('last_update', 'Unknown'),
             }
 
         except Exception as e:
             self.extraction_metadata = {'error': str(e)}
-            self.records = []
-
-        return {'records': self.records, 'metadata': self.extraction_metadata}
 
     def _parse_header(self) -> Dict[str, Any]:
         """Parse dBase file header (first 32 bytes)"""
@@ -83,13 +302,13 @@ class DBaseParser(BaseFormatParser):
         last_update = f"{year:04d}-{month:02d}-{day:02d}"
 
         # Bytes 4-7: Number of records (little-endian)
-        record_count = struct.unpack('<I', self.data[4:8])[0]
+        record_count = struct.unpack_from('<I', self.data, 4)[0]
 
         # Bytes 8-9: Header length
-        header_length = struct.unpack('<H', self.data[8:10])[0]
+        header_length = struct.unpack_from('<H', self.data, 8)[0]
 
         # Bytes 10-11: Record length
-        record_length = struct.unpack('<H', self.data[10:12])[0]
+        record_length = struct.unpack_from('<H', self.data, 10)[0]
 
         return {
             'file_type': file_type,
@@ -105,15 +324,20 @@ class DBaseParser(BaseFormatParser):
         offset = 32
 
         while offset < header_length - 1:
+            if offset >= len(self.data):
+                raise ValueError('Field descriptors run past the end of the file')
+
             # Each field descriptor is 32 bytes
-            descriptor = self.data[offset:offset + 32]
+            descriptor = self.view[offset:offset + 32]
 
             # Check for end of field descriptors (0x0D)
             if descriptor[0] == 0x0D:
                 break
+            if len(descriptor) < 32:
+                raise ValueError('Field descriptors run past the end of the file')
 
             # Parse field name (first 11 bytes, null-terminated)
-            name = descriptor[0:11].split(b'\x00')[0].decode('ascii', errors='ignore')
+            name = bytes(descriptor[0:11]).split(b'\x00')[0].decode('ascii', errors='ignore')
 
             # Field type (byte 11)
             field_type = chr(descriptor[11])
@@ -130,54 +354,26 @@ class DBaseParser(BaseFormatParser):
 
             offset += 32
 
-    def _parse_records(self, record_count: int, header_length: int):
-        """Parse data records"""
-        offset = header_length
+    def _parse_records(self, start: int, stop: int) -> Iterator[Dict[str, Any]]:
+        """Parse data records start to stop - 1, skipping deleted rows"""
+        record_length = self.header['record_length']
+        offset = self.header['header_length'] + start * record_length
 
-        for _ in range(record_count):
-            # First byte: deletion flag
+        for _ in range(start, stop):
             if offset >= len(self.data):
                 break
 
-            deleted = self.data[offset] == ord('*')
-            offset += 1
+            record = self._parse_record(offset)
+            offset += record_length
 
-            if deleted:
-                # Skip deleted records (but could optionally include them)
-                record_size = sum(f['length'] for f in self.field_definitions)
-                offset += record_size
-                continue
+            # Skip deleted records (but could optionally include them)
+            if record is not None:
+                yield record
 
-            # Parse field values
-            record = {}
-            for field_def in self.field_definitions:
-                field_length = field_def['length']
-                field_data = self.data[offset:offset + field_length]
-
-                # Parse based on field type
-                value = self._parse_field_value(field_data, field_def['type'])
-                record[field_def['name']] = value
-
-                offset += field_length
-
-            self.records.append(record)
-
-    def _parse_field_value(self, data: bytes, field_type: str):
-        """Parse individual field value based on type"""
-        try:
-            raw_value = data.decode('ascii', errors='ignore').strip()
-
-            if field_type == 'C':  # Character
-                return raw_value
-            elif field_type == 'N':  # Numeric
-                return float(raw_value) if '.' in raw_value else int(raw_value)
-            elif field_type == 'L':  # Logical
-                return raw_value.upper() in ('T', 'Y')
-            elif field_type == 'D':  # Date (YYYYMMDD)
-                if len(raw_value) == 8:
-                    return f"{raw_value[0:4]}/{raw_value[4:6]}/{raw_value[6:8]}"
-                return raw_value
-            else:
-                return raw_value
-        except:
+    def _parse_record(self, offset: int) -> Optional[Dict[str, Any]]:
+        """Parse the record at offset, or return None if it is deleted"""
+        # First byte: deletion flag
+        if self.data[offset] == ord('*'):
             return None
+
+        return self._decoder.decode(self.view, offset + 1)
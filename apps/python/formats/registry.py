@@ -0,0 +1,93 @@
+"""Format registry for detecting a file's parser before loading it"""
+
+from pathlib import Path
+from typing import List, Dict, Optional, Type
+
+from .base import BaseFormatParser
+
+
+class FormatRegistry:
+    """
+    Index of parsers by magic bytes and file extension
+
+    Detection reads only the first few bytes of a file and looks the
+    prefix up in a dict per distinct magic length, so picking a parser
+    never requires loading or trial-parsing the file.
+    """
+
+    def __init__(self):
+        self.parsers: List[Type[BaseFormatParser]] = []
+        self._by_magic: Dict[bytes, List[Type[BaseFormatParser]]] = {}
+        self._by_extension: Dict[str, List[Type[BaseFormatParser]]] = {}
+        self._magic_lengths: List[int] = []  # Longest first
+
+    def register(self, parser_class: Type[BaseFormatParser]) -> Type[BaseFormatParser]:
+        """Add a parser to the registry (usable as a class decorator)"""
+        metadata = parser_class.get_metadata()
+        self.parsers.append(parser_class)
+
+        if metadata.magic_bytes:
+            self._by_magic.setdefault(metadata.magic_bytes, []).append(parser_class)
+            self._magic_lengths = sorted({len(m) for m in self._by_magic}, reverse=True)
+
+        for ext in metadata.extensions:
+            self._by_extension.setdefault(ext.lower(), []).append(parser_class)
+
+        return parser_class
+
+    @property
+    def header_size(self) -> int:
+        """Bytes of file header needed to check every registered magic"""
+        return self._magic_lengths[0] if self._magic_lengths else 0
+
+    def detect(self, filepath: Path, header: Optional[bytes] = None,
+               name: Optional[str] = None) -> Optional[Type[BaseFormatParser]]:
+        """
+        Return the parser class for a file, or None if no format claims it
+
+        A magic-byte match wins over an extension match, and longer magic
+        wins over shorter. Among parsers sharing the same magic, one that
+        also claims the extension is preferred. Files without matching
+        magic fall back to their extension.
+
+        Args:
+            filepath: File to detect
+            header: First bytes of the file if already read; otherwise
+                just ``header_size`` bytes are read from disk
+            name: Name to take the extension from, for files stored
+                under another name (such as content-addressed uploads)
+        """
+        if header is None:
+            header = b''
+            if self.header_size:
+                try:
+                    with open(filepath, 'rb') as f:
+                        header = f.read(self.header_size)
+                except OSError:
+                    pass
+
+        by_extension = self._by_extension.get(Path(name or filepath).suffix.lower(), [])
+
+        for length in self._magic_lengths:
+            candidates = self._by_magic.get(bytes(header[:length]), []) if len(header) >= length else []
+            if candidates:
+                for parser_class in candidates:
+                    if parser_class in by_extension:
+                        return parser_class
+                return candidates[0]
+
+        return by_extension[0] if by_extension else None
+
+    def extensions(self) -> List[str]:
+        """All registered file extensions"""
+        return list(self._by_extension)
+
+
+# Default registry holding the built-in formats
+registry = FormatRegistry()
+
+
+def detect_format(filepath: Path, header: Optional[bytes] = None,
+                  name: Optional[str] = None) -> Optional[Type[BaseFormatParser]]:
+    """Detect a file's parser with the default registry"""
+    return registry.detect(filepath, header, name)
@@ -2,15 +2,40 @@
 
 import re
 import struct
+from collections import deque
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
-from .base import BaseFormatParser, FormatMetadata
+from .base import BaseFormatParser, FormatMetadata, FLOAT, DATE as DATE_COLUMN
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_DOUBLE = struct.Struct('<d')
+
+# Token kinds emitted by SmartWareParser._tokenize
+DATE = 'DATE'
+QUADRAT = 'QUADRAT'
+NUMBER = 'NUMBER'
+
+# Dates (YYYY/MM/DD) and quadrat IDs in one pattern. The lookaheads keep
+# every match zero-width, so a quadrat's digits can run into a date; they
+# also report overlapping matches of one kind, which _text_tokens drops to
+# match the two separate finditer passes this replaces.
+_TEXT_TOKENS = re.compile(rb'(?=(19\d{2}/\d{2}/\d{2}))|(?=([msw]\d+[rq]\d+q?\d*))')
 
 
 class SmartWareParser(BaseFormatParser):
     """Parser for SmartWare II .ws files"""
 
+    DATE_RADIUS = 100     # Quadrats this close to a date belong to its survey
+    FIELD_WINDOW = 300    # Bytes after a quadrat ID searched for cover values
+    FIELD_COUNT = 9       # Cover values collected per quadrat
+    BLOCK_SIZE = 1 << 16  # Bytes decoded per step of the number scan
+
     @classmethod
     def get_metadata(cls) -> FormatMetadata:
         return FormatMetadata(
@@ -37,81 +62,214 @@ class SmartWareParser(BaseFormatParser):
             'Total',
         ]
 
-    def parse(self) -> Dict[str, Any]:
-        """Parse SmartWare II file and extract vegetation survey data"""
-        dates = self._extract_dates()
-        quadrats = self._extract_quadrats()
-        numbers = self._extract_numbers()
-
-        # Simple proximity-based grouping
-        records = []
-        numbers_dict = {pos: val for pos, val in numbers}
-
-        for date_pos, date_str in dates:
-            nearby_quads = [(pos, qid) for pos, qid in quadrats if abs(pos - date_pos) < 100]
-
-            for quad_pos, quad_id in nearby_quads:
-                row_nums = []
-                for pos in sorted(numbers_dict.keys()):
-                    if quad_pos < pos < quad_pos + 300:
-                        row_nums.append(numbers_dict[pos])
-                        if len(row_nums) >= 9:
-                            break
-
-                if len(row_nums) >= 3:
-                    while len(row_nums) < 9:
-                        row_nums.append(None)
-
-                    records.append({
-                        'Date': date_str,
-                        'Quadrat': quad_id,
-                        'Green Grass': row_nums[0],
-                        'Dead Grass': row_nums[1],
-                        'Green Forb': row_nums[2],
-                        'Dead Forb': row_nums[3],
-                        'Litter': row_nums[4],
-                        'Tree Cover': row_nums[5],
-                        'Bare Ground': row_nums[6],
-                        'Total': row_nums[7],
-                    })
-
-        self.records = records
+    def get_field_types(self) -> Dict[str, str]:
+        """Dates are calendar dates and every cover column is a float"""
+        types = {name: FLOAT for name in self.get_field_names()[2:]}
+        types['Date'] = DATE_COLUMN
+        return types
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Parse SmartWare II file, yielding vegetation survey records as they are grouped"""
+        counts = {DATE: 0, QUADRAT: 0, NUMBER: 0}
+        record_count = 0
+
+        for record in self._group_records(self._tokenize(counts)):
+            record_count += 1
+            yield record
+
         self.extraction_metadata = {
             'filename': self.filename,
-            'dates_found': len(dates),
-            'quadrats_found': len(quadrats),
-            'numbers_found': len(numbers),
-            'records': len(records),
+            'dates_found': counts[DATE],
+            'quadrats_found': counts[QUADRAT],
+            'numbers_found': counts[NUMBER],
+            'records': record_count,
         }
 
-        return {'records': records, 'metadata': self.extraction_metadata}
-
-    def _extract_dates(self):
-        """Extract dates in format YYYY/MM/DD"""
-        pattern = rb'(19\d{2}/\d{2}/\d{2})'
-        return [(m.start(), m.group(1).decode('ascii', errors='ignore'))
-                for m in re.finditer(pattern, self.data)]
-
-    def _extract_quadrats(self):
-        """Extract quadrat IDs"""
-        pattern = rb'([msw]\d+[rq]\d+[q]?\d*)'
-        matches = []
-        for m in re.finditer(pattern, self.data):
-            qid = m.group(1).decode('ascii', errors='ignore')
-            if 4 <= len(qid) <= 10:
-                matches.append((m.start(), qid))
-        return matches
-
-    def _extract_numbers(self):
-        """Extract IEEE 754 double precision numbers"""
+    def _group_records(self, tokens: Iterable[Tuple[int, str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Group an offset-ordered token stream into survey records
+
+        A date owns every quadrat within DATE_RADIUS bytes of it, and each
+        quadrat takes the first FIELD_COUNT numbers in the FIELD_WINDOW bytes
+        after it. Only that trailing window of tokens is kept, and a date's
+        records are yielded as soon as the stream has moved past its reach.
+        """
+        reach = self.DATE_RADIUS + self.FIELD_WINDOW
+        pending_dates = deque()  # (offset, date) not yet emitted
+        quadrats = deque()       # (offset, id, numbers) a pending or future date may own
+        collecting = deque()     # Quadrats whose field window is still open
+
+        def emit(date_pos, date_str):
+            for quad_pos, quad_id, row_nums in quadrats:
+                if abs(quad_pos - date_pos) < self.DATE_RADIUS and len(row_nums) >= 3:
+                    yield self._make_record(date_str, quad_id, row_nums)
+
+        for pos, kind, value in tokens:
+            while pending_dates and pos >= pending_dates[0][0] + reach:
+                yield from emit(*pending_dates.popleft())
+
+            if kind == NUMBER:
+                for quad in collecting:
+                    if quad[0] < pos < quad[0] + self.FIELD_WINDOW and len(quad[2]) < self.FIELD_COUNT:
+                        quad[2].append(value)
+                while collecting and (pos >= collecting[0][0] + self.FIELD_WINDOW
+                                      or len(collecting[0][2]) >= self.FIELD_COUNT):
+                    collecting.popleft()
+                continue
+
+            horizon = min(pending_dates[0][0], pos) if pending_dates else pos
+            while quadrats and quadrats[0][0] <= horizon - self.DATE_RADIUS:
+                quadrats.popleft()
+
+            if kind == QUADRAT:
+                quad = (pos, value, [])
+                quadrats.append(quad)
+                collecting.append(quad)
+            else:
+                pending_dates.append((pos, value))
+
+        while pending_dates:
+            yield from emit(*pending_dates.popleft())
+
+    def _make_record(self, date_str: str, quad_id: str, row_nums: List[float]) -> Dict[str, Any]:
+        """Build a record dict, padding missing cover values with None"""
+        row_nums = row_nums + [None] * (self.FIELD_COUNT - len(row_nums))
+        return {
+            'Date': date_str,
+            'Quadrat': quad_id,
+            'Green Grass': row_nums[0],
+            'Dead Grass': row_nums[1],
+            'Green Forb': row_nums[2],
+            'Dead Forb': row_nums[3],
+            'Litter': row_nums[4],
+            'Tree Cover': row_nums[5],
+            'Bare Ground': row_nums[6],
+            'Total': row_nums[7],
+        }
+
+    def _tokenize(self, counts: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, str, Any]]:
+        """
+        Scan the file once, yielding (offset, kind, value) tokens in offset order
+
+        Dates and quadrat IDs come from a single lazy regex pass, and doubles
+        are decoded block by block right behind it. NUMBER tokens are only
+        yielded inside a quadrat's field window, since nothing else can use
+        them, but every candidate is counted in ``counts`` if given.
+        """
+        if counts is None:
+            counts = {DATE: 0, QUADRAT: 0, NUMBER: 0}
+
+        text_tokens = self._text_tokens()
+        next_text = next(text_tokens, None)
+        windows = deque()  # Offsets of quadrats whose field window may reach this block
+        numbers_end = len(self.data) - 8
+
+        for start in range(0, len(self.data), self.BLOCK_SIZE):
+            stop = start + self.BLOCK_SIZE
+            block = []
+
+            while next_text is not None and next_text[0] < stop:
+                block.append(next_text)
+                counts[next_text[1]] += 1
+                if next_text[1] == QUADRAT:
+                    windows.append(next_text[0])
+                next_text = next(text_tokens, None)
+
+            while windows and windows[0] + self.FIELD_WINDOW <= start + 1:
+                windows.popleft()
+
+            if start < numbers_end:
+                found, numbers = self._extract_numbers(start, min(stop, numbers_end), windows)
+                counts[NUMBER] += found
+                if numbers:
+                    block.extend((pos, NUMBER, value) for pos, value in numbers)
+                    block.sort(key=itemgetter(0))
+
+            yield from block
+
+    def _text_tokens(self) -> Iterator[Tuple[int, str, str]]:
+        """Yield DATE and QUADRAT tokens from one regex pass"""
+        date_end = quadrat_end = 0  # End of the last match of each kind
+        for m in _TEXT_TOKENS.finditer(self.data):
+            start = m.start()
+            if m.group(1) is not None:
+                if start < date_end:
+                    continue
+                date_end = m.end(1)
+                yield (start, DATE, m.group(1).decode('ascii', errors='ignore'))
+            else:
+                if start < quadrat_end:
+                    continue
+                quadrat_end = m.end(2)
+                qid = m.group(2).decode('ascii', errors='ignore')
+                if 4 <= len(qid) <= 10:
+                    yield (start, QUADRAT, qid)
+
+    def _extract_numbers(self, start: int = 0, stop: Optional[int] = None,
+                         windows: Optional[Iterable[int]] = None) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        Extract IEEE 754 double precision numbers starting in [start, stop)
+
+        Returns the number of candidates found and their (offset, value)
+        pairs. If ``windows`` holds quadrat offsets, only values inside one
+        of their field windows are returned.
+        """
+        if stop is None:
+            stop = len(self.data) - 8
+        if np is None:
+            return self._extract_numbers_py(start, stop, windows)
+
+        # One candidate double per byte offset, same as the scalar walk
+        count = stop - start
+        if count <= 0:
+            return 0, []
+
+        # Interleave the eight strided views (one per byte alignment) so
+        # values[i] is the little-endian double starting at offset start + i
+        values = np.empty(count, dtype='<f8')
+        for align in range(8):
+            lane = values[align::8]
+            strided = np.frombuffer(self.data, dtype='<f8',
+                                    count=(len(self.data) - start - align) // 8,
+                                    offset=start + align)
+            lane[:] = strided[:len(lane)]
+
+        # NaN fails both comparisons, so it is dropped along with out-of-range values
+        valid = (values >= -10) & (values <= 10000)
+        found = int(np.count_nonzero(valid))
+
+        if windows is not None:
+            in_window = np.zeros(count, dtype=bool)
+            for quad_pos in windows:
+                lo = max(quad_pos + 1, start) - start
+                hi = min(quad_pos + self.FIELD_WINDOW, stop) - start
+                if lo < hi:
+                    in_window[lo:hi] = True
+            valid &= in_window
+
+        offsets = np.flatnonzero(valid)
+        kept = values[offsets]
+
+        # Anything under half a unit in the fourth decimal rounds to a signed
+        # zero; only the few remaining values need Python's round()
+        rounded = np.copysign(0.0, kept).tolist()
+        for i in np.flatnonzero(np.abs(kept) >= 5e-5).tolist():
+            rounded[i] = round(float(kept[i]), 4)
+
+        return found, list(zip((offsets + start).tolist(), rounded))
+
+    def _extract_numbers_py(self, start: int, stop: int,
+                            windows: Optional[Iterable[int]] = None) -> Tuple[int, List[Tuple[int, float]]]:
+        """Pure-Python fallback for _extract_numbers when NumPy is unavailable"""
         numbers = []
-        i = 0
-        while i < len(self.data) - 8:
-            try:
-                value = struct.unpack('<d', self.data[i:i+8])[0]
-                if not (value != value) and (0 <= value <= 10000 or -10 <= value <= 0):
-                    numbers.append((i, round(value, 4)))
-            except:
-                pass
-            i += 1
-        return numbers
+        for i in range(start, stop):
+            value = _DOUBLE.unpack_from(self.data, i)[0]
+            if not (value != value) and (0 <= value <= 10000 or -10 <= value <= 0):
+                numbers.append((i, round(value, 4)))
+
+        found = len(numbers)
+        if windows is not None:
+            windows = list(windows)
+            numbers = [(pos, value) for pos, value in numbers
+                       if any(q < pos < q + self.FIELD_WINDOW for q in windows)]
+        return found, numbers
@@ -0,0 +1,201 @@
+"""
+Background parsing for uploaded files
+Jobs run on a bounded process pool so parsing never blocks the event loop,
+and results are kept in the on-disk parse cache
+"""
+
+import os
+import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from formats import BaseFormatParser, ParseCache, detect_format
+
+# Worker processes for parsing; LABS_PARSE_WORKERS overrides
+PARSE_WORKERS = int(os.environ.get("LABS_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Records between progress reports from a worker
+PROGRESS_INTERVAL = 5000
+
+# Memory bound for parsed files kept loaded to serve pages of records
+LOADED_RESULTS_BYTES = int(os.environ.get("LABS_LOADED_RESULTS_MAX_BYTES", 512 * 1024 * 1024))
+
+QUEUED = "queued"
+PARSING = "parsing"
+DONE = "done"
+ERROR = "error"
+
+
+def run_parse_job(path: Path, filename: str, content_hash: Optional[str], cache_dir: Path,
+                  progress, job_id: str) -> Dict[str, Any]:
+    """
+    Detect, parse and cache one file; runs in a worker process
+
+    ``filename`` is the name the file was uploaded under, which supplies
+    the extension that ``path`` (a blob named by its hash) lacks. Reports
+    the number of records parsed so far through the shared ``progress``
+    dict every PROGRESS_INTERVAL records.
+    """
+    parser_class = detect_format(path, name=filename)
+    if parser_class is None:
+        raise ValueError(f"Unsupported file format: {filename}")
+
+    cache = ParseCache(cache_dir)
+    with parser_class(path) as parser:
+        key = cache.key_for(parser, content_hash)
+        cached = cache.get(key)
+        if cached is not None:
+            records, metadata = cached
+        else:
+            records = []
+            for record in parser.iter_records():
+                records.append(record)
+                if len(records) % PROGRESS_INTERVAL == 0:
+                    progress[job_id] = len(records)
+            metadata = parser.extraction_metadata
+            cache.put(key, records, metadata)
+
+        return {
+            "key": key,
+            "format": parser_class.get_metadata().name,
+            "fields": parser.get_field_names(),
+            "records": len(records),
+            "metadata": metadata,
+        }
+
+
+@dataclass
+class ParseJob:
+    """A file queued for parsing"""
+    job_id: str
+    path: Path
+    filename: str
+    future: Future
+    submitted_at: float = field(default_factory=time.time)
+
+    @property
+    def state(self) -> str:
+        if not self.future.done():
+            return PARSING if self.future.running() else QUEUED
+        return ERROR if self.future.cancelled() or self.future.exception() else DONE
+
+    @property
+    def result(self) -> Optional[Dict[str, Any]]:
+        return self.future.result() if self.state == DONE else None
+
+
+class ParseJobManager:
+    """
+    Runs parse jobs and serves their results
+
+    Jobs are keyed by content hash, so the same file uploaded by any number
+    of sessions is parsed once. Results are read back from the parse cache,
+    and the most recently used are kept in memory for paging, up to
+    ``max_loaded_bytes`` of estimated record size.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_workers: int = PARSE_WORKERS,
+                 max_loaded_bytes: int = LOADED_RESULTS_BYTES):
+        self.cache = ParseCache(cache_dir) if cache_dir else ParseCache()
+        self.max_workers = max_workers
+        self.max_loaded_bytes = max_loaded_bytes
+        self.jobs: Dict[str, ParseJob] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        # key -> (records, metadata, estimated size)
+        self._loaded: "OrderedDict[str, Tuple[List[Dict[str, Any]], Dict[str, Any], int]]" = OrderedDict()
+        self._loaded_bytes = 0
+
+    def _start(self):
+        # Spawned, not forked, since the server process runs threads
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, path: Path, filename: str, content_hash: str, force: bool = False) -> ParseJob:
+        """
+        Queue a file for parsing
+
+        ``filename`` is the name it was uploaded under, used for format
+        detection. A job already queued or finished for the same content is
+        reused unless ``force`` is set (when its result has left the cache).
+        """
+        job = self.jobs.get(content_hash)
+        if job is not None and job.state != ERROR and not force:
+            return job
+
+        if self._pool is None:
+            self._start()
+        future = self._pool.submit(run_parse_job, path, filename, content_hash,
+                                   self.cache.directory, self._progress, content_hash)
+        job = self.jobs[content_hash] = ParseJob(content_hash, path, filename, future)
+        return job
+
+    def get(self, content_hash: str) -> Optional[ParseJob]:
+        return self.jobs.get(content_hash)
+
+    def discard(self, content_hash: str):
+        """Drop the job for a file that is gone, cancelling it if still queued"""
+        job = self.jobs.pop(content_hash, None)
+        if job is not None:
+            job.future.cancel()
+            if job.state == DONE:
+                self._unload(job.result["key"])
+
+    def status(self, job: ParseJob) -> Dict[str, Any]:
+        """JSON-ready job state, with progress while parsing"""
+        status = {"state": job.state, "submitted_at": job.submitted_at}
+        if job.state == PARSING:
+            status["records_parsed"] = self._progress.get(job.job_id, 0)
+        elif job.state == DONE:
+            result = job.result
+            status.update(format=result["format"], fields=result["fields"], records=result["records"])
+        elif job.state == ERROR:
+            status["error"] = "Cancelled" if job.future.cancelled() else str(job.future.exception())
+        return status
+
+    async def load(self, job: ParseJob) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Records and metadata of a finished job, read from the parse cache off the event loop"""
+        key = job.result["key"]
+        loaded = self._loaded.get(key)
+        if loaded is None:
+            cached = await run_in_threadpool(self.cache.get, key)
+            if cached is None:
+                raise LookupError("Parse result is no longer cached")
+            records, metadata = cached
+            loaded = (records, metadata, BaseFormatParser.records_size(records))
+            self._unload(key)  # Loaded meanwhile by a concurrent request
+            self._loaded[key] = loaded
+            self._loaded_bytes += loaded[2]
+
+            # Least recently used go first; the result just loaded always stays
+            for old_key in list(self._loaded):
+                if self._loaded_bytes <= self.max_loaded_bytes or old_key == key:
+                    break
+                self._unload(old_key)
+        self._loaded.move_to_end(key)
+        return loaded[0], loaded[1]
+
+    def _unload(self, key: str):
+        loaded = self._loaded.pop(key, None)
+        if loaded is not None:
+            self._loaded_bytes -= loaded[2]
+
+    def shutdown(self):
+        """Stop the worker pool, abandoning queued jobs"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._pool = self._manager = self._progress = None
+
+
+# Global parse job manager instance
+parse_jobs = ParseJobManager()
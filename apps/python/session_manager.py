@@ -7,38 +7,127 @@ import os
 import uuid
 import time
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 import shutil
 
+from session_store import SessionStore, MemorySessionStore, SQLiteSessionStore
+
+SESSIONS_DIR = Path("/tmp/labs-sessions")
+
+# Inactivity after which a session is removed
+SESSION_TIMEOUT_MINUTES = 30
+
+# SQLite database shared by all server processes; in-memory state if unset
+SESSION_DB = os.environ.get("LABS_SESSION_DB")
+
+
+class BlobStore:
+    """
+    Uploaded files stored once per content hash
+
+    Sessions hold references to blobs by SHA-256, counted in the session
+    store; a blob is deleted when the last reference to it is released.
+    Callbacks in ``on_remove`` are called with the hash of each deleted blob.
+    """
+
+    def __init__(self, store: SessionStore, root: Path = SESSIONS_DIR / "blobs"):
+        self.store = store
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.on_remove: List[Callable[[str], None]] = []
+
+    def path(self, content_hash: str) -> Path:
+        """Where the blob for a hash is stored"""
+        return self.root / content_hash[:2] / content_hash
+
+    @staticmethod
+    def _store_file(source: Path, path: Path):
+        # Content is identical if the blob exists already, so replacing it is harmless
+        path.parent.mkdir(exist_ok=True)
+        source.replace(path)
+
+    def add(self, source: Path, content_hash: str) -> Path:
+        """Take a reference to a file's content, moving the file into the store"""
+        path = self.path(content_hash)
+        self.store.acquire_blob(content_hash, partial(self._store_file, source, path))
+        return path
+
+    def release(self, content_hash: str):
+        """Drop a reference, deleting the blob once none are left"""
+        path = self.path(content_hash)
+        if self.store.release_blob(content_hash, partial(path.unlink, missing_ok=True)):
+            for callback in self.on_remove:
+                callback(content_hash)
+
+
 class Session:
-    """Represents a user session"""
+    """Represents a user session, whose state is kept in a SessionStore"""
 
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, store: SessionStore, blobs: BlobStore,
+                 created_at: Optional[float] = None, last_activity: Optional[float] = None):
+        now = time.time()
         self.session_id = session_id
-        self.created_at = datetime.now()
-        self.last_activity = datetime.now()
-        self.files: List[Path] = []
-        self.upload_dir = Path(f"/tmp/labs-sessions/{session_id}")
-        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.created_at = datetime.fromtimestamp(created_at or now)
+        self.last_activity = datetime.fromtimestamp(last_activity or now)
+        self.store = store
+        self.blobs = blobs
+        self.upload_dir = SESSIONS_DIR / session_id  # Staging area for uploads in progress
+
+    @property
+    def files(self) -> Dict[str, str]:
+        """SHA-256 of each upload, by file name"""
+        return self.store.files(self.session_id)
 
     def update_activity(self):
         """Update last activity timestamp"""
-        self.last_activity = datetime.now()
+        touched = self.store.touch(self.session_id, time.time())
+        if touched:
+            self.last_activity = datetime.fromtimestamp(touched[1])
+
+    def stage(self) -> Path:
+        """
+        Path to write an upload to before it is added
+
+        Unique per call, so concurrent uploads of the same name never share
+        a file.
+        """
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        return self.upload_dir / f"{uuid.uuid4().hex}.part"
+
+    def add_file(self, filename: str, file_path: Path, content_hash: str) -> Path:
+        """
+        Move an uploaded file into the blob store and reference it by name
 
-    def add_file(self, file_path: Path):
-        """Track an uploaded file"""
-        self.files.append(file_path)
+        Re-uploading a name replaces the earlier file. Returns the blob path.
+        """
+        path = self.blobs.add(file_path, content_hash)
+        try:
+            previous = self.store.set_file(self.session_id, filename, content_hash)
+        except BaseException:
+            # The session was removed meanwhile; don't leak the reference
+            self.blobs.release(content_hash)
+            raise
+        if previous is not None:
+            self.blobs.release(previous)
         self.update_activity()
+        return path
+
+    def file_path(self, filename: str) -> Optional[Path]:
+        """Stored path of one of the session's files"""
+        content_hash = self.files.get(filename)
+        return self.blobs.path(content_hash) if content_hash else None
 
-    def is_inactive(self, timeout_minutes: int = 30) -> bool:
-        """Check if session has been inactive for timeout period"""
-        timeout = timedelta(minutes=timeout_minutes)
-        return datetime.now() - self.last_activity > timeout
+    def release_files(self, files: Dict[str, str]):
+        """Drop references into the blob store for files the session held"""
+        for content_hash in files.values():
+            self.blobs.release(content_hash)
 
-    def cleanup(self):
-        """Clean up session files and directory"""
+    def remove_directory(self):
+        """Delete the session's staging directory; safe to run in a thread"""
         try:
             if self.upload_dir.exists():
                 shutil.rmtree(self.upload_dir)
@@ -47,47 +136,76 @@ class Session:
             print(f"Error cleaning up session {self.session_id}: {e}")
 
 
-class SessionManager:
-    """Manages all user sessions"""
+def default_store() -> SessionStore:
+    """SQLite store at LABS_SESSION_DB if set, otherwise in-memory"""
+    if SESSION_DB:
+        return SQLiteSessionStore(SESSION_DB)
+    return MemorySessionStore()
 
-    def __init__(self):
-        self.sessions: Dict[str, Session] = {}
+
+class SessionManager:
+    """
+    Manages all user sessions
+
+    Session state lives in a SessionStore: in memory for a single process,
+    or SQLite when several server processes share it. The reaper sleeps
+    until the oldest session could expire, and the store hands back only
+    the sessions that are due, so idle wake-ups cost nothing.
+    """
+
+    def __init__(self, store: Optional[SessionStore] = None,
+                 timeout_minutes: int = SESSION_TIMEOUT_MINUTES):
+        self.store = store or default_store()
+        self.blobs = BlobStore(self.store)
+        self.timeout_minutes = timeout_minutes
         self.cleanup_task = None
+        self._cleanup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-cleanup")
 
     def create_session(self) -> str:
         """Create a new session and return session ID"""
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = Session(session_id)
+        self.store.create(session_id, time.time())
         print(f"Created session: {session_id}")
         return session_id
 
     def get_session(self, session_id: str) -> Optional[Session]:
-        """Get session by ID"""
-        session = self.sessions.get(session_id)
-        if session:
-            session.update_activity()
-        return session
-
-    def remove_session(self, session_id: str):
-        """Remove and cleanup a session"""
-        session = self.sessions.pop(session_id, None)
-        if session:
-            session.cleanup()
+        """Get session by ID, recording activity on it"""
+        touched = self.store.touch(session_id, time.time())
+        if touched is None:
+            return None
+        return Session(session_id, self.store, self.blobs, *touched)
+
+    def pop_expired(self, now: Optional[float] = None) -> List[Session]:
+        """Remove sessions inactive past the timeout, releasing their files"""
+        now = time.time() if now is None else now
+        expired = []
+        for session_id, files in self.store.pop_expired(now - self.timeout_minutes * 60):
+            print(f"Cleaning up inactive session: {session_id}")
+            session = Session(session_id, self.store, self.blobs)
+            session.release_files(files)
+            expired.append(session)
+        return expired
+
+    def next_expiry(self) -> float:
+        """Seconds until the oldest session could expire"""
+        oldest = self.store.oldest_activity()
+        if oldest is None:
+            # A session created from now on expires no sooner than this
+            return self.timeout_minutes * 60
+        return max(oldest + self.timeout_minutes * 60 - time.time(), 0)
 
     async def cleanup_inactive_sessions(self):
         """Background task to cleanup inactive sessions"""
+        loop = asyncio.get_running_loop()
         while True:
             try:
-                await asyncio.sleep(60)  # Check every minute
-
-                inactive_sessions = [
-                    sid for sid, session in self.sessions.items()
-                    if session.is_inactive(timeout_minutes=30)
-                ]
+                await asyncio.sleep(self.next_expiry())
 
-                for session_id in inactive_sessions:
-                    print(f"Cleaning up inactive session: {session_id}")
-                    self.remove_session(session_id)
+                # Delete directories off the event loop
+                await asyncio.gather(*(
+                    loop.run_in_executor(self._cleanup_pool, session.remove_directory)
+                    for session in self.pop_expired()
+                ))
 
             except Exception as e:
                 print(f"Error in cleanup task: {e}")
@@ -99,10 +217,7 @@ class SessionManager:
 
     def get_session_stats(self) -> dict:
         """Get statistics about active sessions"""
-        return {
-            "active_sessions": len(self.sessions),
-            "total_files": sum(len(s.files) for s in self.sessions.values())
-        }
+        return self.store.get_stats()
 
 
 # Global session manager instance
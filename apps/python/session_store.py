@@ -0,0 +1,306 @@
+"""
+Storage backends for session state
+Sessions, their file references and blob reference counts live here, so
+that several server processes can share them
+"""
+
+import heapq
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class SessionStore(ABC):
+    """
+    Interface for session state backends
+
+    Timestamps are seconds since the epoch. Blob reference changes take a
+    callback that runs while the count is locked, so placing or deleting
+    the blob file cannot race with another process taking or dropping a
+    reference to the same content.
+    """
+
+    @abstractmethod
+    def create(self, session_id: str, now: float):
+        """Add a new session"""
+        pass
+
+    @abstractmethod
+    def touch(self, session_id: str, now: float) -> Optional[Tuple[float, float]]:
+        """Record activity; returns (created_at, last_activity), or None if there is no such session"""
+        pass
+
+    @abstractmethod
+    def files(self, session_id: str) -> Dict[str, str]:
+        """Content hash of each of a session's files, by name"""
+        pass
+
+    @abstractmethod
+    def set_file(self, session_id: str, filename: str, content_hash: str) -> Optional[str]:
+        """
+        Point a file name at new content; returns the hash it replaced
+
+        Raises KeyError if there is no such session.
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, session_id: str) -> Optional[Dict[str, str]]:
+        """Delete a session, returning its files, or None if there is no such session"""
+        pass
+
+    @abstractmethod
+    def pop_expired(self, cutoff: float) -> List[Tuple[str, Dict[str, str]]]:
+        """Delete and return (session ID, files) for sessions inactive since before cutoff"""
+        pass
+
+    @abstractmethod
+    def oldest_activity(self) -> Optional[float]:
+        """Earliest last_activity of any session (may be earlier than the true value)"""
+        pass
+
+    @abstractmethod
+    def acquire_blob(self, content_hash: str, store: Callable[[], None]):
+        """Add a reference to a blob, calling ``store`` to put the file in place"""
+        pass
+
+    @abstractmethod
+    def release_blob(self, content_hash: str, delete: Callable[[], None]) -> bool:
+        """Drop a reference to a blob, calling ``delete`` and returning True if it was the last"""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """Counts of sessions, file references and unique files"""
+        pass
+
+    def close(self):
+        """Release any resources held"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Session state in this process's memory
+
+    Expiry is tracked in a min-heap of (last_activity, session ID) with one
+    entry per session. Touches only update the session; an entry found to
+    be stale when it reaches the top is re-pushed with the session's
+    current activity time.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, List] = {}  # [created_at, last_activity, files]
+        self.blob_refs: Dict[str, int] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+    def create(self, session_id: str, now: float):
+        self.sessions[session_id] = [now, now, {}]
+        heapq.heappush(self._expiry, (now, session_id))
+
+    def touch(self, session_id: str, now: float) -> Optional[Tuple[float, float]]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        session[1] = now
+        return session[0], now
+
+    def files(self, session_id: str) -> Dict[str, str]:
+        session = self.sessions.get(session_id)
+        return dict(session[2]) if session else {}
+
+    def set_file(self, session_id: str, filename: str, content_hash: str) -> Optional[str]:
+        files = self.sessions[session_id][2]
+        previous = files.get(filename)
+        files[filename] = content_hash
+        return previous
+
+    def remove(self, session_id: str) -> Optional[Dict[str, str]]:
+        session = self.sessions.pop(session_id, None)
+        return session[2] if session else None
+
+    def pop_expired(self, cutoff: float) -> List[Tuple[str, Dict[str, str]]]:
+        expired = []
+        while self._expiry and self._expiry[0][0] <= cutoff:
+            _, session_id = heapq.heappop(self._expiry)
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue  # Removed already
+            if session[1] > cutoff:
+                heapq.heappush(self._expiry, (session[1], session_id))  # Active since
+            else:
+                del self.sessions[session_id]
+                expired.append((session_id, session[2]))
+        return expired
+
+    def oldest_activity(self) -> Optional[float]:
+        return self._expiry[0][0] if self._expiry else None
+
+    def acquire_blob(self, content_hash: str, store: Callable[[], None]):
+        store()
+        self.blob_refs[content_hash] = self.blob_refs.get(content_hash, 0) + 1
+
+    def release_blob(self, content_hash: str, delete: Callable[[], None]) -> bool:
+        count = self.blob_refs.get(content_hash, 0) - 1
+        if count > 0:
+            self.blob_refs[content_hash] = count
+            return False
+        self.blob_refs.pop(content_hash, None)
+        delete()
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "active_sessions": len(self.sessions),
+            "total_files": sum(len(session[2]) for session in self.sessions.values()),
+            "unique_files": len(self.blob_refs),
+            "file_references": sum(self.blob_refs.values())
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session state in a SQLite database, shared between processes
+
+    The database runs in WAL mode so readers never wait for a writer, and
+    every change is a single IMMEDIATE transaction. Expired sessions are
+    found through an index on last_activity, so reaping only reads the
+    rows that are due.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        last_activity REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS sessions_last_activity ON sessions (last_activity);
+    CREATE TABLE IF NOT EXISTS session_files (
+        session_id TEXT NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        PRIMARY KEY (session_id, name)
+    );
+    CREATE TABLE IF NOT EXISTS blobs (
+        content_hash TEXT PRIMARY KEY,
+        refs INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, path: Path, timeout: float = 10.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        with self._transaction() as db:
+            for statement in self.SCHEMA.split(";"):
+                if statement.strip():
+                    db.execute(statement)
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction, holding the database lock"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def create(self, session_id: str, now: float):
+        with self._transaction() as db:
+            db.execute("INSERT INTO sessions (id, created_at, last_activity) VALUES (?, ?, ?)",
+                       (session_id, now, now))
+
+    def touch(self, session_id: str, now: float) -> Optional[Tuple[float, float]]:
+        with self._transaction() as db:
+            row = db.execute(
+                "UPDATE sessions SET last_activity = max(last_activity, ?) WHERE id = ? "
+                "RETURNING created_at, last_activity",
+                (now, session_id)).fetchone()
+        return tuple(row) if row else None
+
+    def files(self, session_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, content_hash FROM session_files WHERE session_id = ? ORDER BY rowid",
+                (session_id,)).fetchall()
+        return dict(rows)
+
+    def set_file(self, session_id: str, filename: str, content_hash: str) -> Optional[str]:
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+                raise KeyError(session_id)
+            row = db.execute("SELECT content_hash FROM session_files WHERE session_id = ? AND name = ?",
+                             (session_id, filename)).fetchone()
+            if row:
+                db.execute("UPDATE session_files SET content_hash = ? WHERE session_id = ? AND name = ?",
+                           (content_hash, session_id, filename))
+            else:
+                db.execute("INSERT INTO session_files (session_id, name, content_hash) VALUES (?, ?, ?)",
+                           (session_id, filename, content_hash))
+        return row[0] if row else None
+
+    def _delete(self, db, session_id: str) -> Dict[str, str]:
+        files = dict(db.execute(
+            "SELECT name, content_hash FROM session_files WHERE session_id = ? ORDER BY rowid",
+            (session_id,)).fetchall())
+        db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return files
+
+    def remove(self, session_id: str) -> Optional[Dict[str, str]]:
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+                return None
+            return self._delete(db, session_id)
+
+    def pop_expired(self, cutoff: float) -> List[Tuple[str, Dict[str, str]]]:
+        with self._transaction() as db:
+            ids = [row[0] for row in db.execute(
+                "SELECT id FROM sessions WHERE last_activity <= ?", (cutoff,))]
+            return [(session_id, self._delete(db, session_id)) for session_id in ids]
+
+    def oldest_activity(self) -> Optional[float]:
+        with self._lock:
+            return self._db.execute("SELECT min(last_activity) FROM sessions").fetchone()[0]
+
+    def acquire_blob(self, content_hash: str, store: Callable[[], None]):
+        with self._transaction() as db:
+            db.execute("INSERT INTO blobs (content_hash, refs) VALUES (?, 1) "
+                       "ON CONFLICT (content_hash) DO UPDATE SET refs = refs + 1",
+                       (content_hash,))
+            store()
+
+    def release_blob(self, content_hash: str, delete: Callable[[], None]) -> bool:
+        with self._transaction() as db:
+            row = db.execute("UPDATE blobs SET refs = refs - 1 WHERE content_hash = ? RETURNING refs",
+                             (content_hash,)).fetchone()
+            if row and row[0] > 0:
+                return False
+            db.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+            delete()
+            return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            sessions, = self._db.execute("SELECT count(*) FROM sessions").fetchone()
+            files, = self._db.execute("SELECT count(*) FROM session_files").fetchone()
+            unique, references = self._db.execute("SELECT count(*), coalesce(sum(refs), 0) FROM blobs").fetchone()
+        return {
+            "active_sessions": sessions,
+            "total_files": files,
+            "unique_files": unique,
+            "file_references": references
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -16,7 +16,6 @@ from textual.binding import Binding
 from textual.screen import Screen
 from textual.app import ComposeResult
 
-from formats import SmartWareParser
 from widgets.screens import BaseViewerScreen, BaseFormatsScreen
 
 
@@ -242,8 +241,8 @@ class HistoricFormatViewer(App):
         # Install screens
         self.install_screen(HomeScreen(files), name="home")
 
-        # Create viewer screen with SmartWare parser
-        viewer = BaseViewerScreen(files, SmartWareParser, "SmartWare II")
+        # Create viewer screen; each file's parser is detected from its header
+        viewer = BaseViewerScreen(files)
         self.install_screen(viewer, name="viewer")
 
         # Format information
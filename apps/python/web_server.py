@@ -1,18 +1,112 @@
 import os
 import asyncio
-from fastapi import FastAPI, WebSocket, UploadFile, File, HTTPException, Cookie
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+import base64
+import binascii
+import hashlib
+import json
+from fastapi import FastAPI, WebSocket, UploadFile, File, HTTPException, Cookie, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from textual_serve.server import Server as TextualServer
 import uvicorn
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
+from formats import BaseFormatParser, detect_format
 from viewer import HistoricFormatViewer
 from session_manager import session_manager
+from parse_jobs import parse_jobs, ParseJob, DONE, ERROR
+
+# Max upload file size: 50MB
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Records per page from the records endpoint
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Records serialized together into each chunk of a streamed response
+STREAM_BATCH_SIZE = 500
+
+_encode_json = json.JSONEncoder(default=str).encode
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware rejecting oversized upload bodies as they arrive
+
+    FastAPI reads (and spools) the whole multipart body before the endpoint
+    runs, so the limit is enforced here: up front from Content-Length, and
+    while streaming for chunked requests.
+    """
+
+    def __init__(self, app, max_size: int, paths: Tuple[str, ...] = ("/api/upload",)):
+        self.app = app
+        self.max_size = max_size
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_size:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # Once the body is cut off, whatever error the app makes of it
+            # is replaced with a 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            {"detail": f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024*1024)}MB"},
+            status_code=413,
+        )
+        await response(scope, receive, send)
+
 
 app = FastAPI()
 
+# Forget parse jobs for files no session references any more
+session_manager.blobs.on_remove.append(parse_jobs.discard)
+
+# Reject oversized uploads before they are read into a spool file
+app.add_middleware(UploadSizeLimit, max_size=MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,9 +119,6 @@ app.add_middleware(
 # Store active TUI instances
 tui_instances = {}
 
-# Max upload file size: 50MB
-MAX_UPLOAD_SIZE = 50 * 1024 * 1024
-
 # Create a Textual app instance
 textual_app = HistoricFormatViewer([])
 
@@ -65,10 +156,47 @@ async def create_session():
     })
 
 
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def save_upload(file: UploadFile, destination: Path) -> Tuple[int, str]:
+    """
+    Copy an upload to disk chunk by chunk, hashing it on the way
+
+    ``destination`` should be a staging path of its own, since the file is
+    deleted again on failure. Raises HTTPException(413) as soon as it
+    passes MAX_UPLOAD_SIZE.
+
+    Returns:
+        (size in bytes, SHA-256 hex digest)
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(destination, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024*1024)}MB"
+                    )
+                # Hash and write off the event loop
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+
+    return size, digest.hexdigest()
+
+
 @app.post("/api/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    session_id: str = Header(...)
+    session_id: str = Header(..., alias="X-Session-ID")
 ):
     """Upload a file to the session"""
     if not session_id:
@@ -78,34 +206,39 @@ async def upload_file(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
+    # Stage the file in the session directory, then move it into the shared
+    # blob store; only the name part of the upload is used
+    filename = Path(file.filename or "").name
+    if not filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+    staged_path = session.stage()
 
-    if file_size > MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024*1024)}MB"
-        )
-
-    # Save file to session directory
-    file_path = session.upload_dir / file.filename
     try:
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        file_size, content_hash = await save_upload(file, staged_path)
+        file_path = session.add_file(filename, staged_path, content_hash)
 
-        session.add_file(file_path)
+        # Parse in the background, once per unique file; progress is polled
+        # from the status endpoint
+        job = parse_jobs.submit(file_path, filename, content_hash)
 
         return JSONResponse({
-            "filename": file.filename,
+            "filename": filename,
             "size": file_size,
-            "path": str(file_path)
+            "sha256": content_hash,
+            "path": str(file_path),
+            "parse": parse_jobs.status(job)
         })
 
+    except HTTPException:
+        raise
+    except KeyError:
+        # Expired while the upload was in progress
+        raise HTTPException(status_code=404, detail="Session not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        # Left behind only if it never made it into the blob store
+        staged_path.unlink(missing_ok=True)
 
 
 @app.get("/api/session/{session_id}/files")
@@ -115,18 +248,168 @@ async def get_session_files(session_id: str):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    files = [
-        {
-            "name": f.name,
+    files = []
+    for name, content_hash in session.files.items():
+        f = session.blobs.path(content_hash)
+        files.append({
+            "name": name,
             "size": f.stat().st_size if f.exists() else 0,
+            "sha256": content_hash,
             "path": str(f)
-        }
-        for f in session.files
-    ]
+        })
 
     return JSONResponse({"files": files})
 
 
+def encode_cursor(offset: int, content_hash: str) -> str:
+    """Opaque cursor for a position in a file's records"""
+    return base64.urlsafe_b64encode(f"{content_hash[:16]}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, content_hash: str) -> int:
+    """Record offset from a cursor, rejecting cursors made for other content"""
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if prefix != content_hash[:16] or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor does not belong to this file")
+    return offset
+
+
+def select_fields(fields: Optional[str], available: List[str]) -> List[str]:
+    """Columns named in a comma-separated fields parameter, or all of them"""
+    if not fields:
+        return available
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def get_parse_job(session_id: str, filename: str) -> ParseJob:
+    """Parse job for a session's file, queueing one if there is none yet"""
+    session = session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    content_hash = session.files.get(filename)
+    if content_hash is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return parse_jobs.get(content_hash) or parse_jobs.submit(session.file_path(filename), filename, content_hash)
+
+
+@app.get("/api/session/{session_id}/files/{filename}/status")
+async def get_file_status(session_id: str, filename: str):
+    """Parse progress for an uploaded file"""
+    job = get_parse_job(session_id, filename)
+    return JSONResponse(parse_jobs.status(job))
+
+
+@app.get("/api/session/{session_id}/files/{filename}/records")
+async def get_file_records(
+    session_id: str,
+    filename: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None
+):
+    """
+    A page of parsed records
+
+    Pass the previous page's ``next_cursor`` to continue, and a
+    comma-separated ``fields`` list to return only those columns. Answers
+    202 with the job status while the file is still being parsed, and 422
+    if it could not be parsed.
+    """
+    job = get_parse_job(session_id, filename)
+    offset = decode_cursor(cursor, job.job_id) if cursor else 0
+    status = parse_jobs.status(job)
+    if job.state == ERROR:
+        raise HTTPException(status_code=422, detail=f"Parse failed: {status['error']}")
+    if job.state != DONE:
+        return JSONResponse(status, status_code=202)
+
+    try:
+        records, _ = await parse_jobs.load(job)
+    except LookupError:
+        # Evicted from the parse cache; parse it again
+        job = parse_jobs.submit(job.path, job.filename, job.job_id, force=True)
+        return JSONResponse(parse_jobs.status(job), status_code=202)
+
+    columns = select_fields(fields, status["fields"])
+    page = records[offset:offset + limit]
+    if columns != status["fields"]:
+        page = [{name: record.get(name) for name in columns} for record in page]
+
+    next_offset = offset + len(page)
+    return JSONResponse({
+        "fields": columns,
+        "total": len(records),
+        "records": page,
+        "next_cursor": encode_cursor(next_offset, job.job_id) if next_offset < len(records) else None
+    })
+
+
+def open_parser(file_path: Path, filename: str) -> BaseFormatParser:
+    """Detect a file's format, by its content and uploaded name, and open a parser on it"""
+    parser_class = detect_format(file_path, name=filename)
+    if parser_class is None:
+        raise HTTPException(status_code=422, detail=f"Unsupported file format: {filename}")
+    return parser_class(file_path)
+
+
+def stream_records(parser: BaseFormatParser, columns: Optional[List[str]]) -> Iterator[bytes]:
+    """
+    Yield a parser's records as NDJSON, STREAM_BATCH_SIZE records per chunk
+
+    A plain generator: StreamingResponse steps it in a worker thread, so
+    parsing never runs on the event loop, and only one batch is held in
+    memory at a time. Closes the parser when done.
+    """
+    try:
+        batch = []
+        for record in parser.iter_records():
+            if columns is not None:
+                record = {name: record.get(name) for name in columns}
+            batch.append(_encode_json(record))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield ("\n".join(batch) + "\n").encode()
+                batch = []
+        if batch:
+            yield ("\n".join(batch) + "\n").encode()
+    finally:
+        parser.close()
+
+
+@app.get("/api/session/{session_id}/files/{filename}/records.ndjson")
+async def stream_file_records(session_id: str, filename: str, fields: Optional[str] = None):
+    """
+    Every record of a file as newline-delimited JSON
+
+    Records are sent as they are parsed, independently of the background
+    parse job, so the first ones arrive before the file is fully read.
+    """
+    session = session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    file_path = session.file_path(filename)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    parser = await run_in_threadpool(open_parser, file_path, filename)
+    try:
+        columns = select_fields(fields, parser.get_field_names()) if fields else None
+    except HTTPException:
+        parser.close()
+        raise
+
+    return StreamingResponse(stream_records(parser, columns), media_type="application/x-ndjson")
+
+
 # Removed the previous /ws WebSocket endpoint as textual_serve will manage its own.
 # @app.websocket("/ws")
 # async def websocket_endpoint(websocket: WebSocket):
@@ -142,9 +425,23 @@ async def startup_event():
     session_manager.start_cleanup_task()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the parse workers"""
+    parse_jobs.shutdown()
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
+    workers = int(os.environ.get("WEB_WORKERS", 1))
     print(f"Starting web server with TUI on port {port}")
-    print(f"Session cleanup: 30 minute inactivity timeout")
+    print(f"Session cleanup: {session_manager.timeout_minutes} minute inactivity timeout")
     print(f"Max upload size: {MAX_UPLOAD_SIZE // (1024*1024)}MB")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    if workers > 1:
+        # Worker processes share sessions through SQLite; they import this
+        # module afresh and read the environment set here
+        os.environ.setdefault("LABS_SESSION_DB", "/tmp/labs-sessions/sessions.db")
+        print(f"Workers: {workers}, sessions in {os.environ['LABS_SESSION_DB']}")
+        uvicorn.run("web_server:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
@@ -1,12 +1,15 @@
 """Reusable widgets for the TUI"""
 
-from .panels import StatsPanel, InfoPanel, FileListPanel
+from .panels import StatsPanel, CorpusPanel, InfoPanel, FileListPanel
+from .table import RecordTable
 from .screens import BaseViewerScreen, BaseFormatsScreen
 
 __all__ = [
     "StatsPanel",
+    "CorpusPanel",
     "InfoPanel",
     "FileListPanel",
+    "RecordTable",
     "BaseViewerScreen",
     "BaseFormatsScreen",
 ]
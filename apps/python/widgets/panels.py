@@ -1,44 +1,49 @@
 """Reusable panel widgets"""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from textual import events
+from textual.message import Message
 from textual.widgets import Static, Button, Label
 from textual.containers import Vertical
+from rich.console import Group
 from rich.table import Table as RichTable
 from rich.panel import Panel
 
+from formats import RecordStats, CorpusStats
+
 
 class StatsPanel(Static):
     """Reusable statistics display panel"""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.stats = {}
+        self.stats = None
 
-    def update_stats(self, records: List[Dict], metadata: Dict, format_name: str = "Data"):
-        """Update statistics from records"""
-        if not records:
-            self.update(f"No {format_name} loaded")
-            return
+    def update_stats(self, records: Optional[List[Dict]], metadata: Dict, format_name: str = "Data",
+                     stats: Optional[RecordStats] = None):
+        """
+        Update statistics from records
 
-        # Calculate basic stats
-        dates = [r.get('Date') for r in records if r.get('Date')]
-        unique_keys = {}
+        Pass ``stats`` when it has already been gathered (for instance while
+        parsing) to skip the pass over ``records``.
+        """
+        if stats is None:
+            stats = RecordStats(records or ())
+        self.stats = stats
 
-        # Find all unique values for first few columns
-        if records:
-            for key in list(records[0].keys())[:5]:
-                unique_vals = set(r.get(key) for r in records if r.get(key) is not None)
-                if len(unique_vals) < len(records):  # Only track if not all unique
-                    unique_keys[key] = len(unique_vals)
+        if not stats.records:
+            self.update(f"No {format_name} loaded")
+            return
 
         table = RichTable(title=f"{format_name} Statistics", show_header=True, header_style="bold cyan")
         table.add_column("Metric", style="cyan")
         table.add_column("Value", justify="right", style="green")
 
-        table.add_row("Total Records", str(len(records)))
+        table.add_row("Total Records", str(stats.records))
 
-        if dates:
-            table.add_row("Date Range", f"{dates[0]} to {dates[-1]}")
+        dates = stats.columns.get('Date')
+        if dates and dates.first:
+            table.add_row("Date Range", f"{dates.first} to {dates.last}")
 
         # Add metadata
         for key, value in metadata.items():
@@ -46,28 +51,69 @@ class StatsPanel(Static):
                 display_key = key.replace('_', ' ').title()
                 table.add_row(display_key, str(value))
 
-        # Add unique counts
-        for key, count in unique_keys.items():
-            table.add_row(f"Unique {key}s", str(count))
+        # Add unique counts for the first few columns, unless all unique
+        for key, column in list(stats.columns.items())[:5]:
+            count = column.distinct.count()
+            if count < stats.records:
+                approx = "" if column.distinct.exact is not None else "~"
+                table.add_row(f"Unique {key}s", f"{approx}{count}")
+
+        # Numeric column summaries
+        for key in stats.numeric_columns()[:3]:  # First 3 numeric columns
+            column = stats.columns[key]
+            table.add_row(f"{key} (avg)", f"{column.mean:.2f}")
+            table.add_row(f"{key} (std dev)", f"{column.std:.2f}")
+            table.add_row(f"{key} (min/max)", f"{column.min} / {column.max}")
+            if column.nulls:
+                table.add_row(f"{key} (empty)", str(column.nulls))
 
-        # Calculate numeric column averages
-        numeric_cols = [k for k, v in records[0].items()
-                       if isinstance(v, (int, float)) and v is not None]
+        self.update(table)
 
-        for col in numeric_cols[:3]:  # First 3 numeric columns
-            values = [r[col] for r in records if isinstance(r.get(col), (int, float))]
-            if values:
-                avg = sum(values) / len(values)
-                table.add_row(f"{col} (avg)", f"{avg:.2f}")
 
-        self.update(table)
+class CorpusPanel(Static):
+    """Statistics across every file in the viewer"""
+
+    def update_corpus(self, corpus: CorpusStats, pending: int = 0, errors: Optional[Dict[str, str]] = None):
+        """Show merged corpus statistics, noting files still being summarised or that failed"""
+        summary = RichTable(title="Corpus Statistics", show_header=True, header_style="bold cyan")
+        summary.add_column("Metric", style="cyan")
+        summary.add_column("Value", justify="right", style="green")
+        summary.add_row("Files", str(corpus.files))
+        summary.add_row("Total Records", str(corpus.totals.records))
+        if pending:
+            summary.add_row("Files Pending", str(pending))
+        for name, error in (errors or {}).items():
+            summary.add_row(f"Skipped {name}", error)
+
+        tables = [summary]
+        for field, grouped in corpus.groups.items():
+            if not grouped.groups:
+                continue
+
+            columns = grouped.numeric_columns()
+            table = RichTable(title=f"Cover by {field} (total / avg)", show_header=True, header_style="bold cyan")
+            table.add_column(field, style="cyan")
+            table.add_column("Records", justify="right")
+            for column in columns:
+                table.add_column(column, justify="right", style="green")
+
+            for key in sorted(grouped.groups, key=str):
+                group = grouped.groups[key]
+                cells = []
+                for column in columns:
+                    stats = group.columns.get(column)
+                    cells.append(f"{stats.total:.1f} / {stats.mean:.2f}" if stats and stats.numeric else "-")
+                table.add_row(str(key), str(group.records), *cells)
+            tables.append(table)
+
+        self.update(Group(*tables))
 
 
 class InfoPanel(Static):
     """Reusable information display panel"""
 
-    def update_info(self, parser, format_name: str):
-        """Update info panel with parser details"""
+    def update_info(self, parser, format_name: str, cache_stats: Optional[Dict[str, int]] = None):
+        """Update info panel with parser details and, if given, parser cache counters"""
         metadata = parser.extraction_metadata
 
         info_text = f"""[bold]{format_name} File Information[/bold]
@@ -89,12 +135,40 @@ class InfoPanel(Static):
         info_text += f"Era: {format_meta.era}\n"
         info_text += f"Category: {format_meta.category}[/dim]"
 
+        if cache_stats:
+            mb = 1024 * 1024
+            info_text += f"""
+
+[bold]Parser Cache[/bold]
+🗂 Files: {cache_stats['parsers']} ({cache_stats['bytes'] / mb:.1f} / {cache_stats['max_bytes'] / mb:.0f} MB)
+✅ Hits: {cache_stats['hits']}  ❌ Misses: {cache_stats['misses']}  🗑 Evictions: {cache_stats['evictions']}"""
+
         self.update(info_text)
 
 
+class FileButton(Button):
+    """File list button that reports when the mouse moves onto it"""
+
+    def __init__(self, label: str, index: int, *args, **kwargs):
+        super().__init__(label, *args, **kwargs)
+        self.index = index
+
+    def on_enter(self, event: events.Enter) -> None:
+        # Enter only reaches the widget under the mouse on older Textual
+        # releases, so the hover is passed on as a bubbling message
+        self.post_message(FileListPanel.FileHovered(self.index))
+
+
 class FileListPanel(Vertical):
     """Reusable file list sidebar panel"""
 
+    class FileHovered(Message):
+        """The mouse moved onto a file's button"""
+
+        def __init__(self, index: int):
+            super().__init__()
+            self.index = index  # 0-based position in the file list
+
     DEFAULT_CSS = """
     FileListPanel {
         dock: left;
@@ -122,4 +196,4 @@ class FileListPanel(Vertical):
         yield Label("📁 Files", id="files-header")
         for i, file in enumerate(self.files, 1):
             file_name = file.name if hasattr(file, 'name') else str(file)
-            yield Button(f"{i}. {file_name}", id=f"file-{i}", variant="default")
+            yield FileButton(f"{i}. {file_name}", i - 1, id=f"file-{i}", variant="default")
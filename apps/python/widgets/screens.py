@@ -1,16 +1,42 @@
 """Reusable screen components"""
 
-from typing import List, Dict, Type
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr
+from multiprocessing import resource_tracker
+from functools import partial
+from typing import List, Dict, Deque, Tuple, Type, Optional
 from pathlib import Path
 from textual.screen import Screen
-from textual.widgets import Header, Footer, DataTable, TabbedContent, TabPane, Static, Button, Label
-from textual.containers import Container, Vertical
+from textual.widgets import Header, Footer, TabbedContent, TabPane, Static, Button, Label
+from textual.containers import Container, Vertical, VerticalScroll
 from textual.binding import Binding
 from textual.reactive import reactive
 from textual.app import ComposeResult
+from textual import work
+from textual.worker import get_current_worker
 
-from formats.base import BaseFormatParser
-from .panels import StatsPanel, InfoPanel, FileListPanel
+from formats import (BaseFormatParser, ParseCache, ParserCache, RecordStats, CorpusStats,
+                     detect_format, summarize_file)
+from .panels import StatsPanel, CorpusPanel, InfoPanel, FileListPanel
+from .table import RecordTable
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool that can be started from inside a Textual app
+
+    Workers are spawned rather than forked since the app runs threads, and
+    the resource tracker is started against the real stderr because
+    Textual's stand-in for sys.stderr has no file descriptor.
+    """
+    with redirect_stderr(sys.__stderr__):
+        resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
 
 
 class BaseViewerScreen(Screen):
@@ -21,7 +47,7 @@ class BaseViewerScreen(Screen):
         background: $surface;
     }
 
-    DataTable {
+    RecordTable {
         height: 1fr;
         border: solid $accent;
     }
@@ -38,6 +64,15 @@ class BaseViewerScreen(Screen):
         padding: 1;
     }
 
+    #corpus-scroll {
+        height: 1fr;
+        border: solid $accent;
+    }
+
+    CorpusPanel {
+        padding: 1;
+    }
+
     .main-content {
         height: 1fr;
     }
@@ -47,18 +82,53 @@ class BaseViewerScreen(Screen):
         Binding("escape", "back", "Back", show=True),
         Binding("q", "quit", "Quit", show=True),
         Binding("r", "refresh", "Refresh", show=True),
-        Binding("1,2,3,4,5,6,7,8,9", "select_file", "Select File", show=False),
+        *[Binding(str(n), f"select_file('{n}')", "Select File", show=False) for n in range(1, 10)],
     ]
 
     current_file_index = reactive(0)
 
-    def __init__(self, files: List[Path], parser_class: Type[BaseFormatParser], format_name: str = "Data"):
+    # Records parsed between data table updates while a file loads
+    ROW_BATCH = 1000
+    # Bytes of speculatively parsed, not yet viewed files to keep
+    PREFETCH_BUDGET = 256 * 1024 * 1024
+    # Seconds a background parse sleeps while waiting on a foreground one
+    PREFETCH_PAUSE = 0.05
+
+    def __init__(self, files: List[Path], parser_class: Optional[Type[BaseFormatParser]] = None,
+                 format_name: Optional[str] = None, parse_cache: Optional[ParseCache] = None):
+        """
+        Args:
+            files: Files to browse
+            parser_class: Parser for every file; detected per file if omitted
+            format_name: Display name; defaults to the parser's format name
+            parse_cache: On-disk parse cache; the default cache if omitted
+        """
         super().__init__()
         self.files = files
         self.parser_class = parser_class
         self.format_name = format_name
-        self.parsers = {}
+        self.parsers = ParserCache()
         self.current_parser = None
+        self.file_stats: Dict[Path, RecordStats] = {}  # Outlive evicted parsers
+
+        # Per-file partials for the Corpus tab, merged on display
+        self.corpus_partials: Dict[Path, CorpusStats] = {}
+        self.corpus_errors: Dict[Path, str] = {}
+        self._corpus_worker = None
+
+        # Speculative parsing of neighbouring and hovered files
+        self._prefetch_queue: Deque[Path] = deque()
+        self._prefetched: Dict[Path, int] = {}  # Unviewed prefetches by age, with sizes
+        self._prefetcher = None
+        self._prefetching: Optional[Path] = None
+        self._parsing_file: Optional[Path] = None
+
+        if parse_cache is None:
+            try:
+                parse_cache = ParseCache()
+            except OSError:
+                pass  # No writable cache directory; always parse from scratch
+        self.parse_cache = parse_cache
 
     def compose(self) -> ComposeResult:
         """Create viewer widgets"""
@@ -72,11 +142,15 @@ class BaseViewerScreen(Screen):
             with Vertical(classes="main-content"):
                 with TabbedContent():
                     with TabPane("Data", id="tab-data"):
-                        yield DataTable(id="data-table")
+                        yield RecordTable(id="data-table")
 
                     with TabPane("Statistics", id="tab-stats"):
                         yield StatsPanel(id="stats-panel")
 
+                    with TabPane("Corpus", id="tab-corpus"):
+                        with VerticalScroll(id="corpus-scroll"):
+                            yield CorpusPanel(id="corpus-panel")
+
                     with TabPane("Info", id="tab-info"):
                         yield InfoPanel(id="info-panel")
 
@@ -88,68 +162,378 @@ class BaseViewerScreen(Screen):
         if self.files:
             self.load_file(0)
 
+    def on_tabbed_content_tab_activated(self, event: TabbedContent.TabActivated) -> None:
+        """Summarise the corpus when its tab is opened"""
+        if event.pane.id == "tab-corpus":
+            self.update_corpus()
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle file selection buttons"""
         if event.button.id and event.button.id.startswith("file-"):
             file_num = int(event.button.id.split("-")[1])
             self.load_file(file_num - 1)
 
+    def on_file_list_panel_file_hovered(self, event: FileListPanel.FileHovered) -> None:
+        """Prefetch a file while the mouse hovers over its button"""
+        self.prefetch(event.index, first=True)
+
     def load_file(self, index: int) -> None:
-        """Load and parse a file"""
+        """Show a file, parsing it in a background worker if not yet loaded"""
         if not (0 <= index < len(self.files)):
             return
 
         file = self.files[index]
         self.current_file_index = index
 
-        # Parse if not cached
+        # Neighbours are parsed in the background once this file is done
+        self._prefetch_queue.clear()
+        self.prefetch(index + 1)
+        self.prefetch(index - 1)
+
+        parser = self.parsers.get(file)
+        if parser is not None:
+            # Switching back to a loaded file stops any parse in progress
+            self.workers.cancel_group(self, "parse")
+            self._parsing_file = None
+            self._prefetched.pop(file, None)
+            self.sub_title = ""
+            self.current_parser = parser
+            self.update_displays()
+            return
+
+        parser_class = self.parser_class or detect_format(file)
+        if parser_class is None:
+            self.notify(f"Unsupported file format: {file.name}", severity="error")
+            return
+
+        self.current_parser = None
+        self.sub_title = f"Parsing {file.name}..."
+        table = self.query_one("#data-table", RecordTable)
+        table.clear()
+        table.loading = True
+
+        if file == self._prefetching:
+            # Already being parsed speculatively; wait for that result
+            self.workers.cancel_group(self, "parse")
+            self._parsing_file = None
+            return
+
+        self._parsing_file = file
+        self.parse_file(file, parser_class)
+
+    @work(thread=True, exclusive=True, group="parse")
+    def parse_file(self, file: Path, parser_class: Type[BaseFormatParser]) -> None:
+        """
+        Parse a file off the event loop
+
+        Rows are handed to the table in batches as the parser yields them.
+        Starting another parse cancels this one, in which case the partial
+        result is dropped.
+        """
+        worker = get_current_worker()
+        try:
+            parser = parser_class(file)
+        except (OSError, ValueError) as e:
+            self.app.call_from_thread(self._parse_failed, file, e)
+            return
+
+        stats = RecordStats()
+        try:
+            hit, key = self._load_cached(parser)
+            if hit:
+                stats.update(parser.records)
+            else:
+                # The table reads this list directly, so rows show up as it grows
+                records = []
+                self.app.call_from_thread(self._start_table, file, parser.get_field_names(), records)
+                format_name = self.format_name or parser.get_metadata().name
+                sync = partial(self.app.call_from_thread, self._show_progress, file, stats, format_name)
+                if not self._read_records(parser, worker, records, key, stats, on_batch=sync):
+                    return
+        except Exception as e:
+            # A malformed file must not take the worker, and with it the app, down
+            parser.close()
+            self.app.call_from_thread(self._parse_failed, file, e)
+            return
+
+        self.app.call_from_thread(self._parse_finished, file, parser, stats)
+
+    def prefetch(self, index: int, first: bool = False) -> None:
+        """
+        Queue a file to be parsed speculatively in the background
+
+        Args:
+            index: Position of the file in ``files``
+            first: Parse it ahead of anything already queued
+        """
+        if not (0 <= index < len(self.files)):
+            return
+
+        file = self.files[index]
+        if file in self.parsers or file == self._prefetching:
+            return
+        if file in self._prefetch_queue:
+            self._prefetch_queue.remove(file)
+        if first:
+            self._prefetch_queue.appendleft(file)
+        else:
+            self._prefetch_queue.append(file)
+
+        if self._prefetcher is None or self._prefetcher.is_finished:
+            self._prefetcher = self.run_prefetch()
+
+    @work(thread=True, group="prefetch")
+    def run_prefetch(self) -> None:
+        """Parse queued files one at a time, standing aside for foreground parses"""
+        worker = get_current_worker()
+        while not worker.is_cancelled:
+            try:
+                file = self._prefetch_queue.popleft()
+            except IndexError:
+                return
+
+            parser_class = self.parser_class or detect_format(file)
+            if file in self.parsers or parser_class is None:
+                continue
+
+            self._prefetching = file
+            try:
+                parser = parser_class(file)
+                stats = RecordStats()
+                hit, key = self._load_cached(parser)
+                if hit:
+                    stats.update(parser.records)
+                elif not self._read_records(parser, worker, [], key, stats, background=True):
+                    return
+            except Exception as e:
+                if self.files[self.current_file_index] == file:
+                    self.app.call_from_thread(self._parse_failed, file, e)
+                continue
+            finally:
+                self._prefetching = None
+
+            self.app.call_from_thread(self._prefetch_finished, file, parser, stats)
+
+    def _load_cached(self, parser: BaseFormatParser) -> Tuple[bool, Optional[str]]:
+        """
+        Fill a parser from the parse cache
+
+        Returns whether it was a hit, and the key to store a fresh parse
+        under (None without a cache).
+        """
+        if not self.parse_cache:
+            return False, None
+
+        key = self.parse_cache.key_for(parser)
+        return self.parse_cache.load_into(parser, key), key
+
+    def _read_records(self, parser: BaseFormatParser, worker, records: List[Dict],
+                      key: Optional[str], stats: RecordStats, on_batch=None,
+                      background: bool = False) -> bool:
+        """
+        Parse into ``records`` and ``stats`` and store the result in the parse cache
+
+        ``on_batch`` is called every ROW_BATCH records. Background parses
+        pause at those points while a file the user picked is parsing.
+        Returns False, with the parser closed, if the worker was cancelled.
+        """
+        for record in parser.iter_records():
+            if worker.is_cancelled:
+                parser.close()
+                return False
+
+            records.append(record)
+            stats.add(record)
+            if len(records) % self.ROW_BATCH == 0:
+                if on_batch:
+                    on_batch()
+                while background and self._parsing_file is not None and not worker.is_cancelled:
+                    time.sleep(self.PREFETCH_PAUSE)
+
+        if worker.is_cancelled:
+            parser.close()
+            return False
+
+        parser.records = records
+        if key:
+            self.parse_cache.put(key, parser.records, parser.extraction_metadata)
+        return True
+
+    def _prefetch_finished(self, file: Path, parser: BaseFormatParser, stats: RecordStats) -> None:
+        """Keep a speculative parse, dropping old ones past the memory budget"""
+        if file in self.parsers:
+            parser.close()
+            return
+
+        if self.files[self.current_file_index] == file and self.current_parser is None:
+            # The user picked this file while it was being prefetched
+            self.workers.cancel_group(self, "parse")
+            self._parse_finished(file, parser, stats)
+            return
+
+        self.parsers.put(file, parser, recent=False)
         if file not in self.parsers:
-            parser = self.parser_class(file)
-            parser.parse()
-            self.parsers[file] = parser
+            return  # Did not fit beside the files already open
+        self.file_stats[file] = stats
+        self._prefetched[file] = parser.memory_size()
+
+        # Oldest speculative parses go first; files the user viewed stay
+        for prefetched in list(self._prefetched):
+            if prefetched not in self.parsers:
+                del self._prefetched[prefetched]  # Already evicted by the LRU
+        while sum(self._prefetched.values()) > self.PREFETCH_BUDGET:
+            oldest = next(iter(self._prefetched))
+            del self._prefetched[oldest]
+            self.parsers.evict(oldest)
+
+        self.update_info()
+
+    def _is_current(self, file: Path) -> bool:
+        return self.files[self.current_file_index] == file and file not in self.parsers
+
+    def _start_table(self, file: Path, headers: List[str], records: List[Dict]) -> None:
+        """Point the table at the record list of a file that is being parsed"""
+        if self._is_current(file):
+            self.query_one("#data-table", RecordTable).show_records(headers, records)
+
+    def _show_progress(self, file: Path, stats: RecordStats, format_name: str) -> None:
+        """Show records and statistics so far while their file is shown"""
+        if self._is_current(file):
+            table = self.query_one("#data-table", RecordTable)
+            table.loading = False
+            table.sync()
+            self.query_one("#stats-panel", StatsPanel).update_stats(None, {}, format_name, stats)
+
+    def _parse_finished(self, file: Path, parser: BaseFormatParser, stats: RecordStats) -> None:
+        """Keep a completed parse and fill in the panels"""
+        if self._parsing_file == file:
+            self._parsing_file = None
+        if file in self.parsers:
+            parser.close()  # Beaten by a prefetch of the same file
+            return
 
-        self.current_parser = self.parsers[file]
+        self.parsers.put(file, parser)
+        self.file_stats[file] = stats
+        if self.files[self.current_file_index] != file:
+            return
+
+        self.sub_title = ""
+        self.current_parser = parser
         self.update_displays()
 
+    def _parse_failed(self, file: Path, error: Exception) -> None:
+        if self._parsing_file == file:
+            self._parsing_file = None
+        if self.files[self.current_file_index] == file:
+            self.sub_title = ""
+            self.query_one("#data-table", RecordTable).loading = False
+        self.notify(f"Could not read {file.name}: {error}", severity="error")
+
     def update_displays(self) -> None:
         """Update all display widgets with current data"""
         if not self.current_parser:
             return
 
         records = self.current_parser.records
-        metadata = self.current_parser.extraction_metadata
 
-        # Update data table
-        table = self.query_one("#data-table", DataTable)
-        table.clear(columns=True)
+        # Update data table; rows are formatted as they scroll into view
+        table = self.query_one("#data-table", RecordTable)
+        table.loading = False
+        if not records:
+            table.clear()
+        elif table.records is records:
+            table.sync()  # Already showing this parse as it streamed in
+        else:
+            table.show_records(self.current_parser.get_field_names(), records)
 
-        if records:
-            # Add columns
-            headers = self.current_parser.get_field_names()
-            for header in headers:
-                table.add_column(header, key=header)
+        self.update_panels()
 
-            # Add rows (first 100 for performance)
-            for record in records[:100]:
-                row = [str(record.get(h, '')) if record.get(h) is not None else '-'
-                       for h in headers]
-                table.add_row(*row)
+    def update_panels(self) -> None:
+        """Update the statistics and info panels for the current parser"""
+        records = self.current_parser.records
+        metadata = self.current_parser.extraction_metadata
+        format_name = self.format_name or self.current_parser.get_metadata().name
 
         # Update stats
+        stats = self.file_stats.get(self.files[self.current_file_index])
         stats_panel = self.query_one("#stats-panel", StatsPanel)
-        stats_panel.update_stats(records, metadata, self.format_name)
+        stats_panel.update_stats(records, metadata, format_name, stats)
 
-        # Update info
+        self.update_info()
+
+    def update_info(self) -> None:
+        """Update the info panel, including the parser cache counters"""
+        if not self.current_parser:
+            return
+        format_name = self.format_name or self.current_parser.get_metadata().name
         info_panel = self.query_one("#info-panel", InfoPanel)
-        info_panel.update_info(self.current_parser, self.format_name)
+        info_panel.update_info(self.current_parser, format_name, self.parsers.stats())
+
+    def update_corpus(self) -> None:
+        """
+        Show statistics across all files
+
+        Files without a cached partial are summarised in the background:
+        loaded ones from their records, the rest in worker processes.
+        """
+        missing = [f for f in self.files if f not in self.corpus_partials and f not in self.corpus_errors]
+        if missing and (self._corpus_worker is None or self._corpus_worker.is_finished):
+            loaded = {f: self.parsers.peek(f).records for f in missing if f in self.parsers}
+            self._corpus_worker = self.summarize_corpus(missing, loaded)
+        self._show_corpus()
+
+    @work(thread=True, group="corpus")
+    def summarize_corpus(self, files: List[Path], loaded: Dict[Path, List[Dict]]) -> None:
+        """Compute per-file corpus partials in parallel"""
+        worker = get_current_worker()
+        pending = [f for f in files if f not in loaded]
+        cache_dir = self.parse_cache.directory if self.parse_cache else None
+
+        with _process_pool(max(1, min(len(pending), os.cpu_count() or 1))) as pool:
+            futures = {pool.submit(summarize_file, f, cache_dir): f for f in pending}
+
+            for file, records in loaded.items():
+                self.app.call_from_thread(self._corpus_partial, file, CorpusStats.from_records(records))
+
+            for future in as_completed(futures):
+                if worker.is_cancelled:
+                    pool.shutdown(cancel_futures=True)
+                    return
+                file = futures[future]
+                try:
+                    self.app.call_from_thread(self._corpus_partial, file, future.result())
+                except Exception as e:
+                    self.app.call_from_thread(self._corpus_partial, file, None, str(e))
+
+    def _corpus_partial(self, file: Path, partial: Optional[CorpusStats], error: Optional[str] = None) -> None:
+        if partial is None:
+            self.corpus_errors[file] = error
+        else:
+            self.corpus_partials[file] = partial
+        self._show_corpus()
+
+    def _show_corpus(self) -> None:
+        """Merge the cached partials in file order and display them"""
+        corpus = CorpusStats()
+        for file in self.files:
+            if file in self.corpus_partials:
+                corpus.merge(self.corpus_partials[file])
+
+        pending = len(self.files) - len(self.corpus_partials) - len(self.corpus_errors)
+        errors = {file.name: error for file, error in self.corpus_errors.items()}
+        self.query_one("#corpus-panel", CorpusPanel).update_corpus(corpus, pending, errors)
 
     def action_refresh(self) -> None:
         """Refresh current file"""
         # Clear cache and reload
         if self.current_parser:
             file = self.files[self.current_file_index]
+            self.corpus_partials.pop(file, None)
+            self.corpus_errors.pop(file, None)
             if file in self.parsers:
-                del self.parsers[file]
+                self.parsers.pop(file).close()
+                self._prefetched.pop(file, None)
+                self.file_stats.pop(file, None)
             self.load_file(self.current_file_index)
 
     def action_select_file(self, key: str) -> None:
@@ -0,0 +1,188 @@
+"""Virtualized record table widget"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from formats import Column
+
+
+class RecordTable(ScrollView, can_focus=True):
+    """
+    Read-only table that only formats the rows it is about to draw
+
+    Rows come either from a sequence of record dicts (a parser's
+    ``records``, which may still be growing while a parse runs) or from
+    the column store returned by ``to_columns()``. Only the visible rows
+    plus ``PREFETCH`` rows either side are ever turned into strings, and
+    at most ``CACHE_ROWS`` formatted rows are kept, so memory for rendered
+    rows stays constant however long the file is.
+    """
+
+    COMPONENT_CLASSES = {
+        "record-table--header",
+        "record-table--odd-row",
+    }
+
+    DEFAULT_CSS = """
+    RecordTable {
+        background: $surface;
+    }
+
+    RecordTable > .record-table--header {
+        text-style: bold;
+        background: $panel;
+        color: $text;
+    }
+
+    RecordTable > .record-table--odd-row {
+        background: $boost;
+    }
+    """
+
+    # Rows formatted beyond each edge of the viewport
+    PREFETCH = 50
+    # Formatted rows kept before the cache is trimmed to the current window
+    CACHE_ROWS = 1000
+    # Column widths grow to fit their contents up to this many cells
+    MAX_COLUMN_WIDTH = 40
+    # Cells between columns
+    GUTTER = 2
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headers: List[str] = []
+        self.row_count = 0
+        self._records: Optional[Sequence[Dict[str, Any]]] = None
+        self._columns: Optional[Dict[str, Column]] = None
+        self._widths: List[int] = []
+        self._rendered: Dict[int, Tuple[str, ...]] = {}
+
+    @property
+    def records(self) -> Optional[Sequence[Dict[str, Any]]]:
+        """Record sequence being shown, or None for a column store"""
+        return self._records
+
+    def show_records(self, headers: List[str], records: Sequence[Dict[str, Any]]) -> None:
+        """
+        Display a sequence of record dicts
+
+        The sequence is read lazily; if it grows afterwards (as it does
+        during a background parse) call ``sync()`` to pick up the new rows.
+        """
+        self._set_source(headers, records=records)
+
+    def show_columns(self, columns: Dict[str, Column]) -> None:
+        """Display a column store as returned by ``to_columns()``"""
+        self._set_source(list(columns), columns=columns)
+
+    def clear(self) -> None:
+        """Remove all rows and columns"""
+        self._set_source([])
+
+    def sync(self) -> None:
+        """Pick up rows appended to the record sequence since the last call"""
+        count = self._source_length()
+        if count != self.row_count:
+            self.row_count = count
+            self._update_virtual_size()
+            self.refresh()
+
+    def _set_source(self, headers: List[str], records=None, columns=None) -> None:
+        self.headers = list(headers)
+        self._records = records
+        self._columns = columns
+        self._rendered.clear()
+        self._widths = [len(header) for header in self.headers]
+        self.row_count = self._source_length()
+        self.scroll_to(0, 0, animate=False)
+        self._update_virtual_size()
+        self.refresh()
+
+    def _source_length(self) -> int:
+        if self._records is not None:
+            return len(self._records)
+        if self._columns:
+            return len(next(iter(self._columns.values())).values)
+        return 0
+
+    def _update_virtual_size(self) -> None:
+        width = sum(self._widths) + self.GUTTER * max(len(self._widths) - 1, 0)
+        # One extra line for the header, which stays pinned to the top
+        self.virtual_size = Size(width, self.row_count + 1)
+
+    def _format_rows(self, start: int, stop: int) -> List[Tuple[str, ...]]:
+        """Turn rows [start, stop) into display strings"""
+        if self._records is not None:
+            headers = self.headers
+            return [
+                tuple('-' if record.get(h) is None else str(record[h]) for h in headers)
+                for record in self._records[start:stop]
+            ]
+
+        cells = []
+        for column in self._columns.values():
+            values = column.values[start:stop].tolist()
+            valid = column.valid[start:stop].tolist()
+            cells.append(['-' if not ok or value is None else str(value)
+                          for value, ok in zip(values, valid)])
+        return list(zip(*cells))
+
+    def _row(self, index: int) -> Tuple[str, ...]:
+        """Formatted row, formatting the surrounding window on a miss"""
+        row = self._rendered.get(index)
+        if row is not None:
+            return row
+
+        if len(self._rendered) >= self.CACHE_ROWS:
+            self._rendered.clear()
+
+        top = int(self.scroll_y)
+        start = max(min(index, top) - self.PREFETCH, 0)
+        stop = min(max(index + 1, top + self.size.height) + self.PREFETCH, self.row_count)
+
+        widths = self._widths
+        grew = False
+        for offset, cells in enumerate(self._format_rows(start, stop)):
+            self._rendered[start + offset] = cells
+            for i, cell in enumerate(cells):
+                if len(cell) > widths[i] and widths[i] < self.MAX_COLUMN_WIDTH:
+                    widths[i] = min(len(cell), self.MAX_COLUMN_WIDTH)
+                    grew = True
+        if grew:
+            self._update_virtual_size()
+            self.refresh()
+
+        return self._rendered[index]
+
+    def _line(self, cells: Sequence[str], style: Style) -> List[Segment]:
+        gutter = " " * self.GUTTER
+        text = gutter.join(
+            (cell if len(cell) <= width else cell[:width - 1] + "…").ljust(width)
+            for cell, width in zip(cells, self._widths)
+        )
+        return [Segment(text, style)]
+
+    def render_line(self, y: int) -> Strip:
+        """Render one line of the viewport"""
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        base_style = self.rich_style
+
+        if y == 0:
+            style = base_style + self.get_component_rich_style("record-table--header")
+            segments = self._line(self.headers, style)
+        else:
+            index = scroll_y + y - 1
+            if index >= self.row_count:
+                return Strip.blank(width, base_style)
+            style = base_style
+            if index % 2:
+                style += self.get_component_rich_style("record-table--odd-row")
+            segments = self._line(self._row(index), style)
+
+        return Strip(segments).crop_extend(scroll_x, scroll_x + width, style)